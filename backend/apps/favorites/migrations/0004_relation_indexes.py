@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("favorites", "0003_initial"),
+        ("recipes", "0005_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="favorite",
+            options={
+                "default_related_name": "favorites",
+                "ordering": ("-id",),
+                "verbose_name": "Избранное",
+                "verbose_name_plural": "Избранное",
+            },
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="recipe",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to="recipes.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="favorite",
+            index=models.Index(fields=["recipe", "user"], name="favorite_recipe_idx"),
+        ),
+    ]
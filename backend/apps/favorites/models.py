@@ -2,6 +2,8 @@ from apps.relations.models import UserRecipeRelation
 
 
 class Favorite(UserRecipeRelation):
+    recipe_counter_field = "favorites_count"
+
     class Meta(UserRecipeRelation.Meta):
         verbose_name = "Избранное"
         verbose_name_plural = "Избранное"
@@ -1,10 +1,18 @@
 from django_filters import rest_framework as filters
 from .models import Ingredient
+from config.search import get_search_backend
 
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(field_name="name", lookup_expr="istartswith")
+    search = filters.CharFilter(method="search_filter")
+
+    def search_filter(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+
+        return get_search_backend().search_ingredients(queryset, value)
 
     class Meta:
         model = Ingredient
-        fields = ("name",)
+        fields = ("name", "search")
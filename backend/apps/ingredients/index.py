@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import sync_to_async
+
+from config.cache import aget_cache_versions, get_cache_version
+from config.compression import ENCODINGS, compress
+from config.constants import INGREDIENT_INDEX_TTL
+from config.renderers import ORJSONRenderer
+from config.routers import primary_reads
+from .models import Ingredient
+
+# Индекс ингредиентов в памяти процесса для автодополнения и готовый JSON
+# всего каталога. Пересобирается, когда меняется версия кэша "ingredients"
+# (сигналы, import_data) или истёк INGREDIENT_INDEX_TTL — на случай нескольких
+# процессов с локальным кэшем.
+
+
+def fold(value):
+    return value.strip().casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    def __init__(self, ingredients, version=None, previous=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        # Порядок каталога совпадает с порядком модели (Meta.ordering)
+        catalogue = [
+            {
+                "id": ingredient.pk,
+                "name": ingredient.name,
+                "measurement_unit": ingredient.measurement_unit,
+            }
+            for ingredient in ingredients
+        ]
+        entries = sorted((fold(item["name"]), item["id"], item) for item in catalogue)
+        self.keys = [key for key, _, _ in entries]
+        self.items = [item for _, _, item in entries]
+
+        self.catalogue = ORJSONRenderer().render(catalogue)
+        self.digest = hashlib.sha256(self.catalogue).hexdigest()[:32]
+        # Сжатые варианты строятся здесь, при пересборке, с максимальным
+        # уровнем; пересборка по TTL обычно не меняет каталог — тогда сжатие
+        # не повторяется
+        if previous is not None and previous.digest == self.digest:
+            self.compressed = previous.compressed
+        else:
+            self.compressed = {
+                encoding: compress(self.catalogue, encoding) for encoding in ENCODINGS
+            }
+
+    def is_fresh(self, version):
+        return (
+            self.version == version
+            and time.monotonic() - self.built_at < INGREDIENT_INDEX_TTL
+        )
+
+    def snapshot(self, encoding=None):
+        """Готовый JSON каталога и его ETag, при необходимости сжатый.
+
+        У каждого сжатого варианта свой строгий ETag.
+        """
+        if encoding is None:
+            return self.catalogue, f'"{self.digest}"'
+        return self.compressed[encoding], f'"{self.digest}-{encoding}"'
+
+    def search(self, query, limit):
+        """Точные совпадения, затем совпадения по началу, затем по подстроке."""
+        query = fold(query)
+        if not query:
+            return self.items[:limit]
+
+        start = bisect_left(self.keys, query)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(query):
+            end += 1
+
+        exact = [
+            position for position in range(start, end) if self.keys[position] == query
+        ]
+        prefix = [
+            position for position in range(start, end) if self.keys[position] != query
+        ]
+        positions = exact + prefix
+        if len(positions) < limit:
+            positions += [
+                position
+                for position, key in enumerate(self.keys)
+                if query in key and not start <= position < end
+            ]
+        return [self.items[position] for position in positions[:limit]]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def rebuild_index(ingredients, version):
+    """Пересобирает индекс один раз на версию, даже при параллельных запросах."""
+    global _index
+
+    with _lock:
+        if _index is None or not _index.is_fresh(version):
+            _index = IngredientIndex(ingredients, version, _index)
+        return _index
+
+
+def get_ingredient_index():
+    version = get_cache_version("ingredients")
+    index = _index
+    if index is not None and index.is_fresh(version):
+        return index
+
+    # Снимок живёт до смены версии, поэтому строится по основной базе
+    with primary_reads():
+        return rebuild_index(Ingredient.objects.all(), version)
+
+
+async def aget_ingredient_index():
+    (version,) = await aget_cache_versions(("ingredients",))
+    index = _index
+    if index is not None and index.is_fresh(version):
+        return index
+
+    with primary_reads():
+        ingredients = [ingredient async for ingredient in Ingredient.objects.all()]
+    # Сжатие каталога занимает до сотен миллисекунд и не должно
+    # останавливать цикл событий
+    return await sync_to_async(rebuild_index, thread_sensitive=False)(
+        ingredients, version
+    )
+
+
+def reset_ingredient_index():
+    global _index
+    _index = None
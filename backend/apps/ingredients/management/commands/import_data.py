@@ -6,6 +6,8 @@ from django.db import transaction
 from django.conf import settings
 
 from apps.ingredients.models import Ingredient
+from apps.ingredients.index import reset_ingredient_index
+from config.cache import bump_cache_version
 
 
 class Command(BaseCommand):
@@ -47,6 +49,9 @@ class Command(BaseCommand):
                     existing.add((name, unit))
 
             Ingredient.objects.bulk_create(new_ingredients)
+            # bulk_create не отправляет сигналы — сбрасываем кэш явно
+            bump_cache_version("ingredients")
+            transaction.on_commit(reset_ingredient_index)
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:59
+
+from django.db import migrations
+
+from config.search import create_search_index, drop_search_index
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ingredients", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_search_index("ingredient"), drop_search_index("ingredient")
+        ),
+    ]
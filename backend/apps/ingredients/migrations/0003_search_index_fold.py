@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from config.search import create_search_index, drop_search_index
+
+
+def rebuild_search_index(apps, schema_editor):
+    # В PostgreSQL индекс по upper(name) меняется на индекс с заменой ё
+    drop_search_index("ingredient")(apps, schema_editor)
+    create_search_index("ingredient")(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ingredients", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,187 @@
-from django.test import TestCase
+import json
+from unittest.mock import patch
 
-# Create your tests here.
+import brotli
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+
+from config.search import PostgreSQLSearchBackend
+
+from .index import reset_ingredient_index
+from .views import IngredientViewSet, async_autocomplete_view
+from .models import Ingredient
+from .serializers import IngredientSerializer
+
+
+class IngredientIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г")
+            for name in (
+                "Сахарная пудра",
+                "сахар",
+                "Ванильный сахар",
+                "Сахар",
+                "Мёд",
+                "соль",
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_ingredient_index()
+
+    def search(self, name):
+        response = self.client.get("/api/ingredients/", {"name": name})
+        self.assertEqual(response.status_code, 200)
+        return [ingredient["name"] for ingredient in response.json()]
+
+    def test_exact_then_prefix_then_substring(self):
+        names = self.search("САХАР")
+
+        self.assertEqual(set(names[:2]), {"сахар", "Сахар"})
+        self.assertEqual(names[2:], ["Сахарная пудра", "Ванильный сахар"])
+
+    def test_folds_yo(self):
+        self.assertEqual(self.search("мед"), ["Мёд"])
+
+    def test_lookup_does_not_query_database_when_warm(self):
+        self.search("соль")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("со"), ["соль"])
+
+    @patch("apps.ingredients.views.INGREDIENT_SEARCH_RESULTS_LIMIT", 2)
+    def test_result_cap(self):
+        self.assertEqual(len(self.search("сахар")), 2)
+
+    async def test_async_autocomplete_matches_sync_view(self):
+        view = async_autocomplete_view(IngredientViewSet.as_view({"get": "list"}))
+        request = AsyncRequestFactory().get("/api/ingredients/", {"name": "сах"})
+
+        response = await view(request)
+
+        self.assertEqual(
+            [ingredient["name"] for ingredient in json.loads(response.content)],
+            await self.asearch("сах"),
+        )
+
+    async def asearch(self, name):
+        response = await self.async_client.get("/api/ingredients/", {"name": name})
+        return [ingredient["name"] for ingredient in response.json()]
+
+    def test_index_reloads_after_edit(self):
+        self.assertEqual(self.search("перец"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="Перец", measurement_unit="г")
+
+        self.assertEqual(self.search("перец"), ["Перец"])
+
+
+class CatalogueSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i}", measurement_unit="г") for i in range(50)
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_ingredient_index()
+
+    def test_catalogue_matches_serializer_and_is_served_from_memory(self):
+        self.client.get("/api/ingredients/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/ingredients/")
+
+        self.assertEqual(
+            response.json(),
+            IngredientSerializer(Ingredient.objects.all(), many=True).data,
+        )
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]{32}"$')
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_compressed_variant(self):
+        plain = self.client.get("/api/ingredients/")
+        response = self.client.get("/api/ingredients/", HTTP_ACCEPT_ENCODING="br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+        self.assertFalse(response["ETag"].startswith("W/"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_compressed_variants_are_built_with_index(self):
+        self.client.get("/api/ingredients/", {"name": "ингр"})
+
+        with patch("apps.ingredients.index.compress") as compress:
+            response = self.client.get("/api/ingredients/", HTTP_ACCEPT_ENCODING="br")
+
+        compress.assert_not_called()
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_not_modified(self):
+        for params in ({}, {"name": "ингр"}):
+            etag = self.client.get("/api/ingredients/", params)["ETag"]
+
+            response = self.client.get(
+                "/api/ingredients/", params, HTTP_IF_NONE_MATCH=etag
+            )
+
+            self.assertEqual(response.status_code, 304)
+
+    def test_snapshot_is_rebuilt_after_change(self):
+        etag = self.client.get("/api/ingredients/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="Перец", measurement_unit="г")
+        response = self.client.get("/api/ingredients/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Перец", [item["name"] for item in response.json()])
+
+    def test_other_filters_use_database(self):
+        response = self.client.get("/api/ingredients/", {"search": "Ингредиент 1"})
+
+        self.assertNotIn("ETag", response)
+
+
+class IngredientSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г")
+            for name in ("Сахарная пудра", "Ванильный сахар", "Мёд")
+        )
+
+    def search(self, query):
+        response = self.client.get("/api/ingredients/", {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return {ingredient["name"] for ingredient in response.json()}
+
+    def test_search_matches_substring_case_insensitively(self):
+        self.assertEqual(self.search("ПУДР"), {"Сахарная пудра"})
+        self.assertEqual(self.search("сахар"), {"Сахарная пудра", "Ванильный сахар"})
+
+    def test_search_folds_yo(self):
+        self.assertEqual(self.search("мед"), {"Мёд"})
+
+    def test_short_search_folds_yo_and_case(self):
+        self.assertEqual(self.search("ме"), {"Мёд"})
+        self.assertEqual(self.search("МЁ"), {"Мёд"})
+        self.assertEqual(self.search("в"), {"Ванильный сахар"})
+
+    def test_postgresql_search_uses_folded_index_expression(self):
+        backend = PostgreSQLSearchBackend()
+        queryset = backend.search_ingredients(Ingredient.objects.all(), "мёд")
+        sql, params = queryset.query.sql_with_params()
+        name = backend.ingredient_name.format('"ingredients_ingredient".')
+        self.assertIn(f"{name} LIKE translate(upper(%s), 'Ё', 'Е')", sql)
+        self.assertIn("%мёд%", params)
+        self.assertIn(
+            f"({backend.ingredient_name.format('')}) gin_trgm_ops",
+            backend.index_sql["ingredient"][1],
+        )
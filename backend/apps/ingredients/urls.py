@@ -1,7 +1,13 @@
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
-from .views import IngredientViewSet
+from .views import IngredientViewSet, async_autocomplete_view
 
 router = DefaultRouter()
 router.register(r"", IngredientViewSet, basename="ingredients")  # без 'ingredients'
 
 urlpatterns = router.urls
+
+if settings.ASYNC_VIEWS:
+    for pattern in urlpatterns:
+        if pattern.name == "ingredients-list":
+            pattern.callback = async_autocomplete_view(pattern.callback)
@@ -1,9 +1,59 @@
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Ingredient
 from .serializers import IngredientSerializer
 from .filters import IngredientFilter
+from .index import aget_ingredient_index, fold, get_ingredient_index
+from config.cache import threaded_view
+from config.compression import negotiate
+from config.constants import (
+    INGREDIENT_CATALOGUE_MAX_AGE,
+    INGREDIENT_SEARCH_RESULTS_LIMIT,
+)
+from config.renderers import ORJSONRenderer
+
+
+def served_from_memory(request):
+    # Весь каталог или автодополнение; остальные фильтры идут через базу
+    return request.GET.get("name") is not None or not request.GET
+
+
+def catalogue_response(request, index):
+    """Ответ из индекса в памяти без ORM и сериализатора.
+
+    Содержимое зависит только от снимка каталога и запроса, поэтому ETag
+    строится из хеша снимка; весь каталог отдаётся заранее сжатым.
+    """
+    name = request.GET.get("name")
+    content = encoding = None
+    if name is None:
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        content, etag = index.snapshot(encoding)
+    else:
+        query = hashlib.md5(fold(name).encode()).hexdigest()[:16]
+        etag = f'"{index.digest}-{query}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        if content is None:
+            content = ORJSONRenderer().render(
+                index.search(name, INGREDIENT_SEARCH_RESULTS_LIMIT)
+            )
+        response = HttpResponse(content, content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={INGREDIENT_CATALOGUE_MAX_AGE}"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -14,3 +64,28 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     search_fields = ("^name",)
     pagination_class = None
+    replica_reads = True
+
+    def list(self, request, *args, **kwargs):
+        if not served_from_memory(request):
+            return super().list(request, *args, **kwargs)
+
+        return catalogue_response(request, get_ingredient_index())
+
+
+def async_autocomplete_view(view):
+    """Асинхронная версия list для ASGI: каталог и ?name= без перехода в поток."""
+    sync_view = threaded_view(view)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if (
+            request.method != "GET"
+            or not served_from_memory(request)
+            or kwargs.get("format")
+        ):
+            return await sync_view(request, *args, **kwargs)
+
+        return catalogue_response(request, await aget_ingredient_index())
+
+    return async_view
@@ -1,8 +1,6 @@
-from django.contrib import admin
 from django.contrib.admin import TabularInline, register, ModelAdmin
 from .models import IngredientInRecipe, Recipe
 from config.constants import INGREDIENT_INLINE_MIN_AMOUNT
-from django.db.models import Count
 
 
 class IngredientInRecipeInline(TabularInline):
@@ -21,15 +19,7 @@ class RecipeAdmin(ModelAdmin):
     inlines = [IngredientInRecipeInline]
     list_per_page = 20
     ordering = ("-created",)
-    readonly_fields = ("favorites_count",)
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(fav_count=Count("favorites"))
-
-    @admin.display(description="В избранном (раз)")
-    def favorites_count(self, obj):
-        return obj.fav_count
+    readonly_fields = ("favorites_count", "in_carts_count")
 
 
 @register(IngredientInRecipe)
@@ -37,3 +27,4 @@ class IngredientInRecipeAdmin(ModelAdmin):
     list_display = ("pk", "recipe", "ingredient", "amount")
     list_filter = ("ingredient",)
     search_fields = ("ingredient__name",)
+    ordering = ("recipe__name", "ingredient__name")
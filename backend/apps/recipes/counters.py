@@ -0,0 +1,27 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    """Количество строк model, ссылающихся через field на внешнюю запись."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def recount(model, counter_field, related_model, related_field):
+    """Исправляет расходящийся счётчик и возвращает число исправленных строк."""
+    actual = count_subquery(related_model, related_field)
+    drifted = (
+        model.objects.annotate(actual=actual)
+        .exclude(**{counter_field: actual})
+        .values_list("pk", flat=True)
+    )
+    return model.objects.filter(pk__in=list(drifted)).update(**{counter_field: actual})
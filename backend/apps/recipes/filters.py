@@ -1,12 +1,32 @@
 import django_filters
-from .models import Recipe
+from django.db.models import Count
+
+from apps.ingredients.models import Ingredient
+from apps.users.models import User
+from .models import IngredientInRecipe, Recipe
+from config.search import get_search_backend
 
 
 class RecipeFilter(django_filters.FilterSet):
+    author = django_filters.ModelMultipleChoiceFilter(
+        queryset=User.objects.all(), distinct=False
+    )
+    # ?ingredients=1&ingredients=2 — рецепты со всеми ингредиентами,
+    # ?ingredients_any=1&ingredients_any=2 — хотя бы с одним из них
+    ingredients = django_filters.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(), method="contains_all_ingredients_filter"
+    )
+    ingredients_any = django_filters.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(), method="contains_any_ingredient_filter"
+    )
+    cooking_time_max = django_filters.NumberFilter(
+        field_name="cooking_time", lookup_expr="lte"
+    )
     is_favorited = django_filters.CharFilter(method="is_recipe_in_favorites_filter")
     is_in_shopping_cart = django_filters.CharFilter(
         method="is_recipe_in_shoppingcart_filter"
     )
+    search = django_filters.CharFilter(method="search_filter")
 
     def is_recipe_in_favorites_filter(self, queryset, name, value):
         user = self.request.user
@@ -24,6 +44,45 @@ class RecipeFilter(django_filters.FilterSet):
 
         return queryset
 
+    # Фильтры по ингредиентам — полусоединения, а не JOIN, чтобы не размножать
+    # строки рецептов и не требовать DISTINCT
+    def contains_all_ingredients_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+
+        return queryset.filter(
+            id__in=IngredientInRecipe.objects.filter(ingredient__in=value)
+            .order_by()
+            .values("recipe_id")
+            .annotate(matched=Count("ingredient_id"))
+            .filter(matched=len(value))
+            .values("recipe_id")
+        )
+
+    def contains_any_ingredient_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+
+        return queryset.filter(
+            id__in=IngredientInRecipe.objects.filter(ingredient__in=value).values(
+                "recipe_id"
+            )
+        )
+
+    def search_filter(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+
+        return get_search_backend().search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
-        fields = ("author", "is_favorited", "is_in_shopping_cart")
+        fields = (
+            "author",
+            "ingredients",
+            "ingredients_any",
+            "cooking_time_max",
+            "is_favorited",
+            "is_in_shopping_cart",
+            "search",
+        )
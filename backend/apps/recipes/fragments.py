@@ -0,0 +1,88 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+
+from config.cache import get_cache_versions
+from config.constants import RESPONSE_CACHE_TIMEOUT
+from config.routers import primary_reads
+from .models import Recipe
+from .serializers import RecipeSerializer
+
+# Представление рецепта делится на общую часть, одинаковую для всех
+# пользователей, и персональные флаги. Общая часть кэшируется по id рецепта
+# и версиям данных, флаги вычисляются из трёх множеств id пользователя.
+
+FRAGMENT_NAMESPACES = ("recipes", "ingredients", "users")
+
+
+def fragment_key(request, versions, recipe_id):
+    return f"recipe-fragment:{request.get_host()}:{versions}:{recipe_id}"
+
+
+def user_relations_key(user_id):
+    return f"user-relations:{user_id}"
+
+
+def get_user_relations(user):
+    """Множества id избранных рецептов, рецептов в корзине и авторов в подписках."""
+    key = user_relations_key(user.pk)
+    relations = cache.get(key)
+    if relations is None:
+        with primary_reads():
+            relations = (
+                set(user.favorites.values_list("recipe_id", flat=True)),
+                set(user.shoppingcarts.values_list("recipe_id", flat=True)),
+                set(user.subscriptions.values_list("author_id", flat=True)),
+            )
+        cache.set(key, relations, RESPONSE_CACHE_TIMEOUT)
+    return relations
+
+
+def invalidate_user_relations(user_id):
+    transaction.on_commit(lambda: cache.delete(user_relations_key(user_id)))
+
+
+def get_shared_fragments(request, recipe_ids):
+    # Версии читаются один раз на запрос, а не для каждого рецепта
+    versions = ":".join(map(str, get_cache_versions(FRAGMENT_NAMESPACES)))
+    keys = {
+        recipe_id: fragment_key(request, versions, recipe_id)
+        for recipe_id in recipe_ids
+    }
+    cached = cache.get_many(keys.values())
+    missing = [recipe_id for recipe_id, key in keys.items() if key not in cached]
+
+    if missing:
+        # Анонимный пользователь: флаги в общей части всегда False.
+        # Фрагменты попадают в кэш, поэтому читаются из основной базы
+        recipes = Recipe.objects.for_feed(AnonymousUser()).filter(pk__in=missing)
+        with primary_reads():
+            fresh = {
+                keys[recipe.pk]: RecipeSerializer(
+                    recipe, context={"request": request}
+                ).data
+                for recipe in recipes
+            }
+        cache.set_many(fresh, RESPONSE_CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    return {recipe_id: cached[key] for recipe_id, key in keys.items() if key in cached}
+
+
+def recipe_representations(request, recipe_ids):
+    """Данные RecipeSerializer для recipe_ids с флагами текущего пользователя."""
+    fragments = get_shared_fragments(request, recipe_ids)
+    favorites, shopping_cart, subscriptions = get_user_relations(request.user)
+
+    representations = []
+    for recipe_id in recipe_ids:
+        if recipe_id not in fragments:
+            continue
+        data = dict(fragments[recipe_id])
+        data["author"] = dict(
+            data["author"], is_subscribed=data["author"]["id"] in subscriptions
+        )
+        data["is_favorited"] = recipe_id in favorites
+        data["is_in_shopping_cart"] = recipe_id in shopping_cart
+        representations.append(data)
+    return representations
@@ -0,0 +1,485 @@
+import argparse
+import base64
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from io import BytesIO, StringIO
+
+from django.conf import settings
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.test import RequestFactory
+from django.test.client import BOUNDARY, encode_multipart
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from apps.favorites.models import Favorite
+from apps.ingredients.index import get_ingredient_index, reset_ingredient_index
+from apps.ingredients.models import Ingredient
+from apps.ingredients.serializers import IngredientSerializer
+from apps.recipes.filters import RecipeFilter
+from apps.recipes.models import IngredientInRecipe, Recipe
+from apps.shopping_cart.exports import shopping_list_lines
+from apps.shopping_cart.models import ShoppingCart
+from apps.shopping_cart.totals import rebuild_cart_totals
+from apps.users.models import User
+from config.constants import INGREDIENT_SEARCH_RESULTS_LIMIT
+from config.fields import Base64ImageField
+from config.renderers import ORJSONRenderer
+
+# Замеры идут в транзакции, которая в конце откатывается, с отдельным
+# кэшем в памяти и временным MEDIA_ROOT — рабочие данные не меняются
+
+# Пик RSS можно измерить только для процесса целиком, поэтому каждая загрузка
+# разбирается в отдельном процессе: benchmark --upload-probe поле:тело:файл
+UPLOAD_PROBE_BODIES = {
+    "base64": "application/json",
+    "multipart": f"multipart/form-data; boundary={BOUNDARY}",
+}
+
+
+def peak_rss():
+    """Пик RSS процесса в КБ.
+
+    ru_maxrss в Linux после execve хранит максимум ещё родительского
+    процесса, а VmHWM считается для нового образа процесса.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class BaselineBase64ImageField(serializers.ImageField):
+    """Поле изображения до user-021: base64 декодируется в память целиком."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith("data:image"):
+            format, imgstr = data.split(";base64,")
+            ext = format.split("/")[-1]
+
+            if ext == "jpeg":
+                ext = "jpg"
+
+            file_name = f"{uuid.uuid4()}.{ext}"
+            decoded_file = base64.b64decode(imgstr)
+
+            return ContentFile(decoded_file, name=file_name)
+
+        return super().to_internal_value(data)
+
+
+UPLOAD_PROBE_FIELDS = {
+    # Поле, хранилище и порог FILE_UPLOAD_MAX_MEMORY_SIZE каждой версии
+    "baseline": (BaselineBase64ImageField, FileSystemStorage, 2621440),
+    "current": (Base64ImageField, None, settings.FILE_UPLOAD_MAX_MEMORY_SIZE),
+}
+
+
+class Command(BaseCommand):
+    help = "Заполняет базу тестовыми данными и замеряет горячие эндпоинты"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=500)
+        parser.add_argument("--ingredients", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--cart", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--upload-probe", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["upload_probe"]:
+            return self.probe_upload(*options["upload_probe"].split(":", 2))
+
+        self.repeat = options["repeat"]
+        random.seed(0)
+        setup_test_environment()
+        try:
+            with (
+                override_settings(
+                    CACHES={
+                        "default": {
+                            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                            "LOCATION": "benchmark",
+                        }
+                    },
+                    MEDIA_ROOT=tempfile.mkdtemp(),
+                ),
+                transaction.atomic(),
+            ):
+                self.seed(options)
+                self.run()
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+            reset_ingredient_index()
+
+    def seed(self, options):
+        started = time.perf_counter()
+        self.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i:05d}", measurement_unit="г")
+            for i in range(options["ingredients"])
+        )
+        self.users = User.objects.bulk_create(
+            User(
+                username=f"bench{i}",
+                email=f"bench{i}@example.com",
+                first_name="Bench",
+                last_name="Bench",
+            )
+            for i in range(options["users"])
+        )
+        self.recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=random.choice(self.users),
+                name=f"Рецепт {i}",
+                text="Описание рецепта. " * 20,
+                cooking_time=random.randint(5, 120),
+            )
+            for i in range(options["recipes"])
+        )
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=10)
+            for recipe in self.recipes
+            for ingredient in random.sample(self.ingredients[:200], 8)
+        )
+        self.user = self.users[0]
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=self.user, recipe=recipe)
+                for recipe in random.sample(self.recipes, options["cart"])
+            )
+        call_command("recount", stdout=StringIO())
+        rebuild_cart_totals()
+        self.stdout.write(
+            f"Данные: {len(self.recipes)} рецептов, {len(self.ingredients)} "
+            f"ингредиентов, {len(self.users)} пользователей "
+            f"({time.perf_counter() - started:.1f} с)\n"
+        )
+
+    def measure(self, label, action, before=None):
+        """Медианы времени и CPU, число запросов и результат action.
+
+        action возвращает размер ответа в байтах или число строк.
+        """
+        wall, cpu = [], []
+        for _ in range(self.repeat):
+            if before:
+                before()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            with CaptureQueriesContext(connection) as queries:
+                size = action()
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(time.process_time() - cpu_start)
+
+        self.stdout.write(
+            f"  {label:<46} {statistics.median(wall) * 1000:8.2f} мс "
+            f"{statistics.median(cpu) * 1000:8.2f} мс CPU "
+            f"{len(queries):4d} запр. {size:9d}"
+        )
+
+    def peak_memory(self, label, action):
+        """Пик памяти Python за время action, без учёта уже занятой."""
+        tracemalloc.start()
+        try:
+            action()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(f"  {label:<46} {peak / 1024:8.0f} КБ пик памяти")
+
+    def get(self, path, client=None, **headers):
+        def action():
+            response = (client or self.anonymous).get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code)
+            if response.streaming:
+                return sum(len(chunk) for chunk in response.streaming_content)
+            return len(response.content)
+
+        return action
+
+    def section(self, title):
+        self.stdout.write(f"\n{title}")
+
+    def run(self):
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.section("user-005: выгрузка списка покупок")
+        self.measure_export()
+
+        self.section("user-006: суммы корзины")
+        stored_totals = (
+            self.user.cart_totals.values(
+                "ingredient__name", "ingredient__measurement_unit"
+            )
+            .annotate(sum=F("total_amount"))
+            .order_by("ingredient__name")
+        )
+        self.measure("до: агрегат Sum по корзине", lambda: len(self.live_totals()))
+        self.measure(
+            "после: готовые суммы ShoppingCartTotal", lambda: len(stored_totals.all())
+        )
+        self.measure(
+            "после: download_shopping_cart целиком",
+            self.get("/api/recipes/download_shopping_cart/", self.client),
+        )
+
+        self.section("user-010: кэш ответов анонимам")
+        detail = f"/api/recipes/{self.recipes[0].pk}/"
+        self.measure(
+            "до: лента, промах кэша", self.get("/api/recipes/"), before=cache.clear
+        )
+        self.measure("после: лента, ответ из кэша", self.get("/api/recipes/"))
+        self.measure("до: рецепт, промах кэша", self.get(detail), before=cache.clear)
+        self.measure("после: рецепт, ответ из кэша", self.get(detail))
+
+        self.section("user-011: фрагменты для пользователя")
+        self.measure(
+            "до: лента, фрагментов нет в кэше",
+            self.get("/api/recipes/", self.client),
+            before=cache.clear,
+        )
+        self.measure(
+            "после: лента, фрагменты в кэше", self.get("/api/recipes/", self.client)
+        )
+        self.measure(
+            "до: рецепт, фрагмента нет в кэше",
+            self.get(detail, self.client),
+            before=cache.clear,
+        )
+        self.measure("после: рецепт, фрагмент в кэше", self.get(detail, self.client))
+
+        self.section("user-012: автодополнение ингредиентов")
+        self.measure(
+            "до: istartswith в базе + сериализатор",
+            lambda: len(
+                JSONRenderer().render(
+                    IngredientSerializer(
+                        Ingredient.objects.filter(name__istartswith="Ингредиент 001")[
+                            :INGREDIENT_SEARCH_RESULTS_LIMIT
+                        ],
+                        many=True,
+                    ).data
+                )
+            ),
+        )
+        self.measure(
+            "после: поиск по индексу в памяти",
+            lambda: len(
+                JSONRenderer().render(
+                    get_ingredient_index().search(
+                        "ингредиент 001", INGREDIENT_SEARCH_RESULTS_LIMIT
+                    )
+                )
+            ),
+        )
+        self.measure(
+            "после: /api/ingredients/?name=, индекс готов",
+            self.get("/api/ingredients/?name=ингредиент 001"),
+        )
+        self.measure(
+            "после: построение индекса",
+            lambda: len(get_ingredient_index().keys),
+            before=reset_ingredient_index,
+        )
+
+        self.section("user-024: сжатие и рендеринг JSON")
+        self.measure("лента, без сжатия", self.get("/api/recipes/"))
+        self.measure("лента, gzip", self.get("/api/recipes/", accept_encoding="gzip"))
+        self.measure("лента, br", self.get("/api/recipes/", accept_encoding="br"))
+        catalogue = IngredientSerializer(Ingredient.objects.all(), many=True).data
+        self.measure(
+            "до: JSONRenderer, весь каталог",
+            lambda: len(JSONRenderer().render(catalogue)),
+        )
+        self.measure(
+            "после: ORJSONRenderer, весь каталог",
+            lambda: len(ORJSONRenderer().render(catalogue)),
+        )
+
+        self.section("user-025: весь каталог ингредиентов")
+        self.measure(
+            "до: база + сериализатор",
+            lambda: len(
+                JSONRenderer().render(
+                    IngredientSerializer(Ingredient.objects.all(), many=True).data
+                )
+            ),
+        )
+        self.measure("после: снимок в памяти", self.get("/api/ingredients/"))
+        self.measure(
+            "после: снимок, br", self.get("/api/ingredients/", accept_encoding="br")
+        )
+        self.measure(
+            "после: снимок, gzip", self.get("/api/ingredients/", accept_encoding="gzip")
+        )
+
+        self.section("user-021: загрузка изображения, отдельный процесс")
+        self.measure_upload()
+
+        self.section("user-014: фильтр «все ингредиенты»")
+        wanted = list(self.recipes[1].ingredients.values_list("pk", flat=True)[:3])
+        chained = Recipe.objects.all()
+        for pk in wanted:
+            chained = chained.filter(ingredients=pk)
+        self.measure(
+            "до: цепочка JOIN + DISTINCT",
+            lambda: len(chained.distinct().values_list("pk", flat=True)),
+        )
+        semijoin = RecipeFilter().contains_all_ingredients_filter(
+            Recipe.objects.all(), "ingredients", wanted
+        )
+        self.measure(
+            "после: полусоединение с HAVING",
+            lambda: len(semijoin.values_list("pk", flat=True)),
+        )
+
+    def live_totals(self):
+        # Агрегат по корзине на каждый запрос, как до user-006
+        return (
+            IngredientInRecipe.objects.filter(recipe__shoppingcarts__user=self.user)
+            .values("ingredient__name", "ingredient__measurement_unit")
+            .annotate(sum=Sum("amount"))
+            .order_by("ingredient__name")
+        )
+
+    def measure_export(self):
+        def buffered():
+            # Исходная выгрузка: весь текст в памяти и во временном файле
+            text = "\n".join(
+                f"{row['ingredient__name']} - {row['sum']} "
+                f"({row['ingredient__measurement_unit']})"
+                for row in self.live_totals()
+            )
+            with tempfile.TemporaryFile() as temp_file:
+                temp_file.write(text.encode("utf-8"))
+                temp_file.seek(0)
+                return len(temp_file.read())
+
+        def first_chunk():
+            lines = shopping_list_lines("txt", self.live_totals().iterator())
+            size = len(next(lines))
+            lines.close()
+            return size
+
+        def streamed():
+            lines = shopping_list_lines("txt", self.live_totals().iterator())
+            return sum(map(len, lines))
+
+        self.measure("до: строка и временный файл, весь ответ", buffered)
+        self.measure("после: поток, весь ответ", streamed)
+        self.measure("после: поток, первая строка", first_chunk)
+        self.peak_memory("до: строка и временный файл", buffered)
+        self.peak_memory("после: поток", streamed)
+
+    def measure_upload(self):
+        noise = Image.frombytes("RGB", (1000, 1000), os.urandom(1000 * 1000 * 3))
+        output = BytesIO()
+        noise.save(output, "PNG")
+        image = output.getvalue()
+        bodies = {
+            "base64": json.dumps(
+                {"image": "data:image/png;base64," + base64.b64encode(image).decode()}
+            ).encode(),
+            "multipart": encode_multipart(
+                BOUNDARY, {"image": SimpleUploadedFile("photo.png", image)}
+            ),
+        }
+        self.stdout.write(f"  PNG {len(image) / 2**20:.1f} МБ")
+
+        with tempfile.TemporaryDirectory() as directory:
+            for body, content in bodies.items():
+                path = os.path.join(directory, body)
+                with open(path, "wb") as file:
+                    file.write(content)
+                for field in UPLOAD_PROBE_FIELDS:
+                    runs = [
+                        subprocess.run(
+                            [
+                                sys.executable,
+                                "manage.py",
+                                "benchmark",
+                                "--upload-probe",
+                                f"{field}:{body}:{path}",
+                            ],
+                            cwd=settings.BASE_DIR,
+                            capture_output=True,
+                            check=True,
+                            text=True,
+                        ).stdout.split()
+                        for _ in range(3)
+                    ]
+                    extra, elapsed = (
+                        statistics.median(float(run[index]) for run in runs)
+                        for index in (0, 1)
+                    )
+                    self.stdout.write(
+                        f"  {f'{field}, {body}':<46} {elapsed:8.2f} мс "
+                        f"{extra / 1024:8.1f} МБ прирост пика RSS"
+                    )
+
+    def probe_upload(self, field, body, path):
+        """Разбирает тело запроса из файла, проверяет и сохраняет изображение.
+
+        Печатает прирост пика RSS в КБ и время в мс. Тело читается из файла
+        как из сокета, поэтому в пик не входит, если его не копирует разбор.
+        """
+        field_class, storage_class, memory_size = UPLOAD_PROBE_FIELDS[field]
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(
+                MEDIA_ROOT=media_root, FILE_UPLOAD_MAX_MEMORY_SIZE=memory_size
+            ),
+            open(path, "rb") as stream,
+        ):
+            storage = storage_class() if storage_class else default_storage
+            request = Request(
+                WSGIRequest(
+                    RequestFactory()._base_environ(
+                        REQUEST_METHOD="POST",
+                        PATH_INFO="/api/recipes/",
+                        CONTENT_TYPE=UPLOAD_PROBE_BODIES[body],
+                        CONTENT_LENGTH=str(os.path.getsize(path)),
+                        **{"wsgi.input": stream},
+                    )
+                ),
+                parsers=(JSONParser(), MultiPartParser()),
+            )
+
+            before = peak_rss()
+            started = time.perf_counter()
+            image = field_class().run_validation(request.data["image"])
+            storage.save(image.name, image)
+            elapsed = time.perf_counter() - started
+            peak = peak_rss()
+
+        self.stdout.write(f"{peak - before} {elapsed * 1000:.2f}")
@@ -0,0 +1,71 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from config.constants import MEDIA_GC_MIN_AGE
+from config.images import forget_renditions
+from config.storage import RENDITIONS_DIR, recently_saved, referenced_media
+
+
+def walk(storage, directory=""):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+def rendition_original(name):
+    # renditions/images/ab/<хеш>.thumb.webp -> images/ab/<хеш>
+    name = name.removeprefix(f"{RENDITIONS_DIR}/")
+    return name.rsplit(".", 2)[0]
+
+
+class Command(BaseCommand):
+    help = "Удаляет медиафайлы, на которые не ссылается ни одна запись"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать файлы, которые будут удалены",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=MEDIA_GC_MIN_AGE,
+            help="Не трогать файлы моложе указанного числа секунд",
+        )
+
+    def handle(self, *args, dry_run=False, min_age=MEDIA_GC_MIN_AGE, **kwargs):
+        storage = default_storage
+        if not storage.exists(""):
+            return
+
+        # Файл сохраняется до коммита транзакции, а повторная загрузка того
+        # же содержимого обновляет mtime, поэтому свежие файлы без ссылок
+        # могут принадлежать ещё не сохранённой записи
+        referenced = referenced_media()
+        originals = {posixpath.splitext(name)[0] for name in referenced}
+
+        removed = 0
+        for name in walk(storage):
+            if name.startswith(f"{RENDITIONS_DIR}/"):
+                original = rendition_original(name)
+                orphan = original not in originals
+            else:
+                original = name
+                orphan = name not in referenced
+            if not orphan or recently_saved(name, min_age, storage):
+                continue
+
+            self.stdout.write(name)
+            if not dry_run:
+                storage.delete(name)
+                # Иначе повторная загрузка того же файла не построит рендиции
+                forget_renditions(original)
+            removed += 1
+
+        verb = "Будет удалено" if dry_run else "Удалено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} файлов: {removed}"))
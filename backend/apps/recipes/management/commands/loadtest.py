@@ -0,0 +1,208 @@
+import argparse
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from .benchmark import Command as BenchmarkCommand
+
+# Нагрузочный замер сервера целиком: gunicorn с gthread (WSGI) и с
+# uvicorn-воркером (ASGI) поверх одной заполненной SQLite во временном
+# каталоге. Клиент — потоки с keep-alive соединениями в этом же процессе,
+# поэтому на одной машине он делит с сервером процессор.
+
+SERVER_MODES = ("wsgi", "asgi")
+SERVER_START_TIMEOUT = 30
+
+
+class Command(BenchmarkCommand):
+    help = "Пропускная способность и p99 горячих эндпоинтов под WSGI и ASGI"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--modes", default=",".join(SERVER_MODES))
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed-only", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["seed_only"]:
+            # Дочерний процесс: данные коммитятся, их читают воркеры сервера
+            random.seed(0)
+            with transaction.atomic():
+                self.seed(options)
+            token = Token.objects.create(user=self.user)
+            self.stdout.write(f"{token.key} {self.recipes[0].pk}")
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{directory}/loadtest.sqlite3",
+                # С DEBUG=False пустой ALLOWED_HOSTS не пропускает 127.0.0.1
+                DEBUG="True",
+            )
+            self.manage(env, "migrate", "-v0")
+            token, recipe_id = (
+                self.manage(
+                    env,
+                    "loadtest",
+                    "--seed-only",
+                    f"--recipes={options['recipes']}",
+                    f"--ingredients={options['ingredients']}",
+                    f"--users={options['users']}",
+                    f"--cart={options['cart']}",
+                )
+                .splitlines()[-1]
+                .split()
+            )
+            endpoints = (
+                ("лента, аноним", "/api/recipes/", {}),
+                (
+                    "лента, пользователь",
+                    "/api/recipes/",
+                    {"Authorization": f"Token {token}"},
+                ),
+                ("рецепт, аноним", f"/api/recipes/{recipe_id}/", {}),
+                (
+                    "ингредиенты ?name=",
+                    f"/api/ingredients/?name={quote('ингредиент 01')}",
+                    {},
+                ),
+                ("короткая ссылка", f"/s/{recipe_id}/", {}),
+            )
+            self.stdout.write(
+                f"{options['workers']} воркер(ов), {options['concurrency']} "
+                f"клиентов, {options['requests']} запросов на эндпоинт"
+            )
+            for mode in options["modes"].split(","):
+                self.section(f"{mode}:")
+                with self.server(env, mode, options, directory) as port:
+                    if port is None:
+                        continue
+                    for label, path, headers in endpoints:
+                        self.report(label, self.load(port, path, headers, options))
+
+    def manage(self, env, *args):
+        return subprocess.run(
+            [sys.executable, "manage.py", *args],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+
+    @contextmanager
+    def server(self, env, mode, options, directory):
+        """Запускает gunicorn в режиме mode; отдаёт порт или None."""
+        with open(os.path.join(directory, f"{mode}.log"), "w+") as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+                cwd=settings.BASE_DIR,
+                env=dict(
+                    env,
+                    SERVER_MODE=mode,
+                    GUNICORN_WORKERS=str(options["workers"]),
+                    GUNICORN_BIND=f"127.0.0.1:{options['port']}",
+                    # Плановый перезапуск воркера оборвал бы соединения замера
+                    GUNICORN_MAX_REQUESTS="0",
+                ),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            try:
+                if self.wait_for_port(process, options["port"]):
+                    yield options["port"]
+                else:
+                    log.seek(0)
+                    self.stderr.write(f"  сервер не запустился:\n{log.read()[-2000:]}")
+                    yield None
+            finally:
+                process.terminate()
+                process.wait()
+
+    @staticmethod
+    def wait_for_port(process, port):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return True
+            except OSError:
+                time.sleep(0.2)
+        return False
+
+    def load(self, port, path, headers, options):
+        """Задержки запросов и число ответов не 200 под нагрузкой.
+
+        Перед замером каждый клиент делает по запросу, чтобы прогреть кэши
+        и открыть соединения.
+        """
+        remaining = options["requests"]
+        lock = threading.Lock()
+
+        def client():
+            nonlocal remaining
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            connection.request("GET", path, headers=headers)
+            connection.getresponse().read()
+            ready.wait()
+
+            latencies, failed = [], 0
+            while True:
+                with lock:
+                    if not remaining:
+                        break
+                    remaining -= 1
+                started = time.perf_counter()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    # Сервер закрыл соединение: ошибка, следующий запрос
+                    # откроет новое
+                    connection.close()
+                    failed += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                failed += response.status != 200
+            connection.close()
+            return latencies, failed
+
+        ready = threading.Barrier(options["concurrency"] + 1, timeout=60)
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            futures = [executor.submit(client) for _ in range(options["concurrency"])]
+            ready.wait()
+            started = time.perf_counter()
+            results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+
+        latencies = [latency for result, _ in results for latency in result]
+        return latencies, sum(failed for _, failed in results), elapsed
+
+    def report(self, label, result):
+        latencies, failed, elapsed = result
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"  {label:<24} {len(latencies) / elapsed:8.0f} запр./с "
+            f"p50 {percentiles[49] * 1000:7.2f} мс "
+            f"p99 {percentiles[98] * 1000:7.2f} мс "
+            f"ошибок {failed}"
+        )
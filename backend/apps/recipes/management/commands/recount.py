@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.favorites.models import Favorite
+from apps.recipes.counters import recount
+from apps.recipes.models import Recipe
+from apps.shopping_cart.models import ShoppingCart
+from apps.users.models import Subscription, User
+
+COUNTERS = (
+    (Recipe, "favorites_count", Favorite, "recipe"),
+    (Recipe, "in_carts_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipe, "author"),
+    (User, "followers_count", Subscription, "author"),
+)
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счётчики рецептов и пользователей"
+
+    def handle(self, *args, **kwargs):
+        for model, counter_field, related_model, related_field in COUNTERS:
+            with transaction.atomic():
+                fixed = recount(model, counter_field, related_model, related_field)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model.__name__}.{counter_field}: исправлено записей: {fixed}"
+                )
+            )
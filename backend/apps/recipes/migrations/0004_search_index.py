@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:59
+
+from django.db import migrations
+
+from config.search import create_search_index, drop_search_index
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0003_recipe_favorites_count_recipe_in_carts_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_search_index("recipe"), drop_search_index("recipe")
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ingredients", "0002_search_index"),
+        ("recipes", "0005_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ingredientinrecipe",
+            options={
+                "ordering": ("id",),
+                "verbose_name": "Ингредиент в рецепте",
+                "verbose_name_plural": "Ингредиенты в рецептах",
+            },
+        ),
+        migrations.AlterField(
+            model_name="ingredientinrecipe",
+            name="ingredient",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recipe_amounts",
+                to="ingredients.ingredient",
+                verbose_name="Ингредиент",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ingredientinrecipe",
+            name="recipe",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ingredient_amounts",
+                to="recipes.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+    ]
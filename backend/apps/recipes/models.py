@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 
 from apps.ingredients.models import Ingredient
+from apps.users.models import Subscription
+from config.counters import DenormalizedCountersMixin
 from config.constants import (
     INGREDIENT_MIN_AMOUNT_IN_RECIPE,
     RECIPE_IMAGE_UPLOAD_TO,
@@ -13,7 +15,50 @@ from config.constants import (
 User = get_user_model()
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def for_feed(self, user):
+        """Рецепты со всем, что нужно RecipeSerializer, за фиксированное число запросов."""
+        from apps.favorites.models import Favorite
+        from apps.shopping_cart.models import ShoppingCart
+
+        queryset = self.select_related("author").prefetch_related(
+            models.Prefetch(
+                "ingredient_amounts",
+                queryset=IngredientInRecipe.objects.select_related(
+                    "ingredient"
+                ).order_by("ingredient__name"),
+            )
+        )
+
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=models.Value(False, output_field=models.BooleanField()),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+                author_is_subscribed=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+
+        return queryset.annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(user=user, recipe=models.OuterRef("pk"))
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(user=user, recipe=models.OuterRef("pk"))
+            ),
+            author_is_subscribed=models.Exists(
+                Subscription.objects.filter(
+                    subscriber=user, author=models.OuterRef("author")
+                )
+            ),
+        )
+
+
+class Recipe(DenormalizedCountersMixin, models.Model):
+    counter_fields = ("favorites_count", "in_carts_count")
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -46,11 +91,26 @@ class Recipe(models.Model):
         db_index=True,
         verbose_name="Дата публикации рецепта",
     )
+    # Счётчики поддерживаются при изменении связей, см. команду recount
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В избранном (раз)"
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В списках покупок (раз)"
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ("-created",)
+        indexes = [
+            # Лента с фильтром cooking_time_max, отсортированная по дате
+            models.Index(
+                fields=["cooking_time", "created"], name="recipe_cooking_time_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -61,12 +121,14 @@ class IngredientInRecipe(models.Model):
         "Recipe",
         on_delete=models.CASCADE,
         verbose_name="Рецепт",
+        db_index=False,  # покрыт уникальным индексом (recipe, ingredient)
         related_name="ingredient_amounts",  # recipe.ingredient_amounts — связи ингредиентов с количеством
     )
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
         verbose_name="Ингредиент",
+        db_index=False,  # покрыт индексом (ingredient, recipe)
         related_name="recipe_amounts",  # ingredient.recipe_amounts — связи с рецептами и их количество
     )
     amount = models.PositiveSmallIntegerField(
@@ -85,7 +147,11 @@ class IngredientInRecipe(models.Model):
                 name="unique_ingredient_recipe_relation",
             )
         ]
-        ordering = ("recipe__name", "ingredient__name")
+        indexes = [
+            # Покрывающий индекс для фильтров рецептов по ингредиентам
+            models.Index(fields=["ingredient", "recipe"], name="ingredient_recipe_idx"),
+        ]
+        ordering = ("id",)
 
     def __str__(self):
         return f"{self.ingredient.name} — {self.amount} ({self.ingredient.measurement_unit}) в рецепте {self.recipe.name}"
@@ -1,14 +1,23 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from apps.favorites.models import Favorite
 from apps.shopping_cart.models import ShoppingCart
+from apps.shopping_cart.totals import (
+    batch_cart_totals,
+    recipe_cart_user_ids,
+    recipe_ingredient_ids,
+    schedule_cart_totals,
+)
 from .models import Recipe, IngredientInRecipe
 from apps.users.serializers import UserShortSerializer
 from apps.ingredients.serializers import (
     IngredientInRecipeSerializer,
     CreateShortIngredientsSerializer,
 )
+from config.constants import RECIPE_IMAGE_RENDITIONS
 from config.fields import Base64ImageField
+from config.images import rendition_urls
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -16,6 +25,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientInRecipeSerializer(source="ingredient_amounts", many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -27,11 +37,26 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_renditions",
             "text",
             "cooking_time",
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, "author_is_subscribed"):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+    def get_image_renditions(self, obj):
+        return rendition_urls(
+            obj.image, RECIPE_IMAGE_RENDITIONS, self.context.get("request")
+        )
+
     def get_is_favorited(self, obj):
+        # Значение заранее посчитано в Recipe.objects.for_feed
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
+
         request = self.context.get("request")
 
         return (
@@ -41,6 +66,9 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
+
         request = self.context.get("request")
 
         return (
@@ -65,9 +93,9 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         )
 
     def to_representation(self, instance):
-        serializer = RecipeSerializer(
-            instance, context={"request": self.context.get("request")}
-        )
+        request = self.context.get("request")
+        instance = Recipe.objects.for_feed(request.user).get(pk=instance.pk)
+        serializer = RecipeSerializer(instance, context={"request": request})
         return serializer.data
 
     def validate(self, data):
@@ -89,6 +117,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                 )
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop("ingredients")
 
@@ -98,9 +127,16 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        IngredientInRecipe.objects.filter(recipe=instance).delete()
-        self.create_ingredients(validated_data.pop("ingredients"), instance)
+        # Удаление старого состава пересчитывает суммы сигналами, новый
+        # создаётся через bulk_create без сигналов — пересчёт добавляется явно
+        with batch_cart_totals():
+            IngredientInRecipe.objects.filter(recipe=instance).delete()
+            self.create_ingredients(validated_data.pop("ingredients"), instance)
+            schedule_cart_totals(
+                recipe_cart_user_ids(instance), recipe_ingredient_ids(instance)
+            )
         return super().update(instance, validated_data)
 
     def create_ingredients(self, ingredients, recipe):
@@ -115,9 +151,16 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_renditions", "cooking_time")
+
+    def get_image_renditions(self, obj):
+        return rendition_urls(
+            obj.image, RECIPE_IMAGE_RENDITIONS, self.context.get("request")
+        )
 
 
 class UserRecipeRelationSerializer(serializers.Serializer):
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from config.constants import RECIPE_IMAGE_RENDITIONS
+from config.counters import change_counter
+from config.images import schedule_renditions
+from config.pagination import invalidate_cached_counts
+from apps.users.models import User
+from .models import Recipe
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    bump_cache_version("recipes")
+    if created:
+        invalidate_cached_counts("recipes")
+        change_counter(User.objects.filter(pk=instance.author_id), "recipes_count", 1)
+    schedule_renditions(instance.image, RECIPE_IMAGE_RENDITIONS, "recipes")
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    bump_cache_version("recipes")
+    invalidate_cached_counts("recipes")
+    change_counter(User.objects.filter(pk=instance.author_id), "recipes_count", -1)
@@ -1,7 +1,14 @@
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
+from config.cache import async_cached_view
 from .views import RecipeViewSet
 
 router = DefaultRouter()
 router.register(r"", RecipeViewSet, basename="recipes")
 
 urlpatterns = router.urls
+
+if settings.ASYNC_VIEWS:
+    for pattern in urlpatterns:
+        if pattern.name in ("recipes-list", "recipes-detail"):
+            pattern.callback = async_cached_view(pattern.callback)
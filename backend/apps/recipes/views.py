@@ -1,5 +1,7 @@
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -12,31 +14,69 @@ from rest_framework.permissions import (
 from rest_framework.response import Response
 
 from apps.favorites.models import Favorite
+from apps.shopping_cart.exports import (
+    SHOPPING_LIST_FORMATS,
+    ashopping_list_lines,
+    shopping_list_lines,
+)
 from apps.shopping_cart.models import ShoppingCart
+from config.cache import AnonymousResponseCacheMixin
 from config.pagination import MainPagePagination
 from config.permissions import IsAuthorOrReadOnly
+from config.renderers import CSVRenderer, ORJSONRenderer, PlainTextRenderer
 from .filters import RecipeFilter
-from .models import (
-    IngredientInRecipe,
-    Recipe,
-)
+from .fragments import invalidate_user_relations, recipe_representations
+from .models import Recipe
 from .serializers import (
     CreateRecipeSerializer,
     FavoriteSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
 )
-import tempfile
 from rest_framework.views import APIView
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = MainPagePagination
+    replica_reads = True
+    count_cache_namespace = "recipes"
+    count_cache_private_params = ("is_favorited", "is_in_shopping_cart")
+    response_cache_namespaces = ("recipes", "ingredients", "users")
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        return super().get_queryset().for_feed(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return self.personalized_list(request)
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return self.personalized_retrieve(request, kwargs["pk"])
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def personalized_list(self, request):
+        # Из базы выбираются только id страницы, остальное — из кэша фрагментов
+        queryset = self.filter_queryset(Recipe.objects.only("id", "created"))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            recipe_representations(request, [recipe.pk for recipe in page])
+        )
+
+    @staticmethod
+    def personalized_retrieve(request, pk):
+        recipe = get_object_or_404(Recipe.objects.only("id"), pk=pk)
+        representations = recipe_representations(request, [recipe.pk])
+        # Рецепт могли удалить между проверкой и чтением фрагмента
+        if not representations:
+            raise Http404
+        return Response(representations[0])
+
     def get_serializer_class(self):
         if self.action in ("create", "partial_update"):
             return CreateRecipeSerializer
@@ -55,6 +95,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path="favorite",
         url_name="favorite",
     )
+    @transaction.atomic
     def favorite(self, request, pk):
         if request.method == "POST":
             return self.create_user_recipe_relation(request, pk, FavoriteSerializer)
@@ -73,7 +114,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path="shopping_cart",
         url_name="shopping_cart",
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk):
+        # Суммы списка покупок пересчитываются сигналами корзины
         if request.method == "POST":
             return self.create_user_recipe_relation(request, pk, ShoppingCartSerializer)
         return self.delete_user_recipe_relation(
@@ -95,6 +138,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_user_relations(request.user.pk)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -121,6 +165,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
 
         relation_qs.delete()
+        invalidate_user_relations(request.user.pk)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -130,37 +175,33 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
         url_path="download_shopping_cart",
         url_name="download_shopping_cart",
+        # Формат выбирается через ?format= (txt, csv, json) или заголовок Accept
+        renderer_classes=(PlainTextRenderer, CSVRenderer, ORJSONRenderer),
     )
     def download_shopping_cart(self, request):
+        # Суммы поддерживаются в ShoppingCartTotal при изменении корзины
         ingredients = (
-            IngredientInRecipe.objects.filter(
-                recipe__in=ShoppingCart.objects.filter(user=request.user).values(
-                    "recipe"
-                )
+            request.user.cart_totals.values(
+                "ingredient__name", "ingredient__measurement_unit"
             )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(sum=Sum("amount"))
+            .annotate(sum=F("total_amount"))
+            .order_by("ingredient__name")
         )
 
-        return self.ingredients_to_txt(ingredients)
+        file_format = request.accepted_renderer.format
+        # Под ASGI синхронный поток буферизуется целиком, поэтому строки
+        # читаются асинхронным итератором
+        if settings.ASYNC_VIEWS:
+            lines = ashopping_list_lines(file_format, ingredients.aiterator())
+        else:
+            lines = shopping_list_lines(file_format, ingredients.iterator())
 
-    @staticmethod
-    def ingredients_to_txt(ingredients):
-        shopping_list = "\n".join(
-            f"{ingredient['ingredient__name']} - {ingredient['sum']} "
-            f"({ingredient['ingredient__measurement_unit']})"
-            for ingredient in ingredients
+        response = StreamingHttpResponse(
+            lines, content_type=SHOPPING_LIST_FORMATS[file_format][0]
         )
-        temp_file = tempfile.NamedTemporaryFile(mode="w+b", delete=False, suffix=".txt")
-        temp_file.write(shopping_list.encode("utf-8"))
-        temp_file.seek(0)
-        response = FileResponse(
-            temp_file,
-            as_attachment=True,
-            filename="shopping_list.txt",
-            content_type="text/plain",
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_list.{file_format}"'
         )
-        response["Content-Disposition"] = 'attachment; filename="shopping_list.txt"'
         return response
 
     @action(
@@ -178,10 +219,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(data={"short-link": url})
 
 
-class ShortRecipeRedirectView(APIView):
+class ShortRecipeRedirectView(AnonymousResponseCacheMixin, APIView):
     permission_classes = (AllowAny,)
+    response_cache_namespaces = ("recipes", "ingredients", "users")
 
     def get(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
+        if request.user.is_authenticated:
+            return RecipeViewSet.personalized_retrieve(request, pk)
+        return self.cached_response(request, self.get_recipe, pk)
+
+    def get_recipe(self, request, pk):
+        recipe = get_object_or_404(Recipe.objects.for_feed(request.user), pk=pk)
         serializer = RecipeSerializer(recipe, context={"request": request})
         return Response(serializer.data)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RelationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.relations"
+
+    def ready(self):
+        from .signals import connect_relation_counters
+
+        connect_relation_counters()
@@ -1,15 +1,20 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.recipes.models import Recipe
+from config.counters import change_counter
 
 User = get_user_model()
 
 
 class UserRecipeRelation(models.Model):
+    # Счётчик в Recipe, который меняется вместе с добавлением/удалением связи
+    recipe_counter_field = None
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name="Пользователь",
+        db_index=False,  # покрыт уникальным индексом (user, recipe)
         related_name="%(class)ss",
         # user.favorites — избранные рецепты пользователя (если класс Favorite)
         # user.shoppingcarts — списки покупок пользователя (если класс ShoppingCart)
@@ -18,6 +23,7 @@ class UserRecipeRelation(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         verbose_name="Рецепт",
+        db_index=False,  # покрыт индексом (recipe, user)
         related_name="%(class)ss",
         # recipe.favorites — пользователи, добавившие рецепт в избранное
         # recipe.shoppingcarts — пользователи, добавившие рецепт в список покупок
@@ -30,7 +36,17 @@ class UserRecipeRelation(models.Model):
                 fields=["user", "recipe"], name="unique_user_recipe_%(class)s"
             )
         ]
-        ordering = ("-user",)
+        indexes = [
+            # Выборки по рецепту: счётчики, корзины пользователей рецепта
+            models.Index(fields=["recipe", "user"], name="%(class)s_recipe_idx"),
+        ]
+        ordering = ("-id",)
 
     def __str__(self):
         return f"{self.user} — {self.recipe}"
+
+    @classmethod
+    def change_recipe_counter(cls, recipe_id, delta):
+        change_counter(
+            Recipe.objects.filter(pk=recipe_id), cls.recipe_counter_field, delta
+        )
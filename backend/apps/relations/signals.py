@@ -0,0 +1,25 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from apps.recipes.models import Recipe
+from config.counters import deleted_with
+from .models import UserRecipeRelation
+
+
+def relation_saved(sender, instance, created, **kwargs):
+    if created:
+        sender.change_recipe_counter(instance.recipe_id, 1)
+
+
+def relation_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_with(origin, Recipe):
+        sender.change_recipe_counter(instance.recipe_id, -1)
+
+
+def connect_relation_counters():
+    # Счётчики Recipe меняются сигналами, поэтому их учитывают и админка,
+    # и каскадное удаление пользователя
+    for model in apps.get_models():
+        if issubclass(model, UserRecipeRelation):
+            post_save.connect(relation_saved, sender=model)
+            post_delete.connect(relation_deleted, sender=model)
@@ -1,3 +1,71 @@
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from apps.favorites.models import Favorite
+from apps.ingredients.models import Ingredient
+from apps.recipes.models import IngredientInRecipe, Recipe
+from apps.shopping_cart.models import ShoppingCart, ShoppingCartTotal
+from apps.users.models import Subscription, User
+
+
+class HotQueryIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = User.objects.bulk_create(
+            User(email=f"{name}@example.com", username=name)
+            for name in ("user", "author")
+        )
+        cls.ingredient = Ingredient.objects.create(name="Соль", measurement_unit="г")
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name="Рецепт", text="-", cooking_time=5
+        )
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # На пустых таблицах планировщик всегда выбирает последовательный скан
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+        else:
+            self.assertNotRegex(plan, r"\bSCAN\b")
+
+    def test_user_recipe_relations(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(
+                    model.objects.filter(user=self.user, recipe=self.recipe)
+                )
+                self.assertUsesIndex(model.objects.filter(recipe=self.recipe))
+                self.assertUsesIndex(
+                    Recipe.objects.filter(
+                        **{f"{model.__name__.lower()}s__user": self.user}
+                    )
+                )
+
+    def test_subscriptions(self):
+        self.assertUsesIndex(
+            Subscription.objects.filter(subscriber=self.user, author=self.author)
+        )
+        self.assertUsesIndex(Subscription.objects.filter(author=self.author))
+        self.assertUsesIndex(User.objects.filter(followers__subscriber=self.user))
+
+    def test_ingredients_in_recipe(self):
+        self.assertUsesIndex(IngredientInRecipe.objects.filter(recipe=self.recipe))
+        self.assertUsesIndex(
+            Recipe.objects.filter(
+                id__in=IngredientInRecipe.objects.filter(
+                    ingredient=self.ingredient
+                ).values("recipe_id")
+            )
+        )
+
+    def test_shopping_list(self):
+        self.assertUsesIndex(
+            ShoppingCartTotal.objects.filter(user=self.user).select_related(
+                "ingredient"
+            )
+        )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShoppingCartConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.shopping_cart"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,84 @@
+import csv
+import json
+
+# Потоковые форматы списка покупок: формат -> (content type, начало файла,
+# строка(номер, ингредиент), конец файла). Ингредиент — словарь с ключами
+# ingredient__name, ingredient__measurement_unit и sum.
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+csv_writer = csv.writer(Echo())
+
+
+def shopping_list_txt(index, ingredient):
+    return (
+        f"{ingredient['ingredient__name']} - {ingredient['sum']} "
+        f"({ingredient['ingredient__measurement_unit']})\n"
+    )
+
+
+def shopping_list_csv(index, ingredient):
+    return csv_writer.writerow(
+        (
+            ingredient["ingredient__name"],
+            ingredient["sum"],
+            ingredient["ingredient__measurement_unit"],
+        )
+    )
+
+
+def shopping_list_json(index, ingredient):
+    item = json.dumps(
+        {
+            "name": ingredient["ingredient__name"],
+            "amount": ingredient["sum"],
+            "measurement_unit": ingredient["ingredient__measurement_unit"],
+        },
+        ensure_ascii=False,
+    )
+    return f",{item}" if index else item
+
+
+SHOPPING_LIST_FORMATS = {
+    "txt": ("text/plain; charset=utf-8", "", shopping_list_txt, ""),
+    "csv": (
+        "text/csv; charset=utf-8",
+        csv_writer.writerow(("Ингредиент", "Количество", "Единица измерения")),
+        shopping_list_csv,
+        "",
+    ),
+    "json": ("application/json", "[", shopping_list_json, "]"),
+}
+
+
+def shopping_list_lines(file_format, ingredients):
+    _, header, line, footer = SHOPPING_LIST_FORMATS[file_format]
+    if header:
+        yield header.encode("utf-8")
+    for index, ingredient in enumerate(ingredients):
+        yield line(index, ingredient).encode("utf-8")
+    if footer:
+        yield footer.encode("utf-8")
+
+
+async def ashopping_list_lines(file_format, ingredients):
+    """Асинхронная версия shopping_list_lines для ASGI.
+
+    Синхронный итератор ASGI-обработчик Django сначала читает целиком и
+    только потом отправляет, асинхронный отдаётся по мере чтения из базы.
+    """
+    _, header, line, footer = SHOPPING_LIST_FORMATS[file_format]
+    if header:
+        yield header.encode("utf-8")
+    index = 0
+    async for ingredient in ingredients:
+        yield line(index, ingredient).encode("utf-8")
+        index += 1
+    if footer:
+        yield footer.encode("utf-8")
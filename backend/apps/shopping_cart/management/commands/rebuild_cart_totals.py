@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from apps.shopping_cart.totals import find_cart_total_mismatches, rebuild_cart_totals
+
+
+class Command(BaseCommand):
+    help = "Пересобирает суммы списков покупок (ShoppingCartTotal)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="ID пользователя (можно указать несколько раз)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить расхождения, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        users = options["users"]
+
+        if options["check"]:
+            mismatches = find_cart_total_mismatches(users)
+            for user, ingredient, expected, stored in mismatches:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Пользователь {user}, ингредиент {ingredient}: "
+                        f"ожидалось {expected}, сохранено {stored}"
+                    )
+                )
+            if mismatches:
+                self.stdout.write(
+                    self.style.ERROR(f"Найдено расхождений: {len(mismatches)}")
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS("Расхождений не найдено"))
+            return
+
+        created = rebuild_cart_totals(users)
+        self.stdout.write(self.style.SUCCESS(f"Создано записей: {created}"))
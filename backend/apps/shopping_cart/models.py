@@ -1,8 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from apps.ingredients.models import Ingredient
 from apps.relations.models import UserRecipeRelation
 
+User = get_user_model()
+
 
 class ShoppingCart(UserRecipeRelation):
+    recipe_counter_field = "in_carts_count"
+
     class Meta(UserRecipeRelation.Meta):
         verbose_name = "Список покупок"
         verbose_name_plural = "Списки покупок"
         default_related_name = "shopping_carts"
+
+
+class ShoppingCartTotal(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        db_index=False,  # покрыт уникальным индексом (user, ingredient)
+        related_name="cart_totals",  # user.cart_totals — готовый список покупок
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name="Ингредиент",
+        related_name="cart_totals",
+    )
+    total_amount = models.PositiveIntegerField(verbose_name="Общее количество")
+
+    class Meta:
+        verbose_name = "Сумма в списке покупок"
+        verbose_name_plural = "Суммы в списках покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"], name="unique_cart_total"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} — {self.ingredient}: {self.total_amount}"
@@ -0,0 +1,85 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.recipes.models import IngredientInRecipe, Recipe
+from .models import ShoppingCart
+from .totals import recipe_cart_user_ids, recipe_ingredient_ids, schedule_cart_totals
+
+# Суммы ShoppingCartTotal обновляются здесь, а не в представлениях, чтобы
+# изменения из админки и каскадные удаления тоже их учитывали.
+
+
+def direct_delete(sender, origin):
+    # При каскадном удалении рецепта суммы пересчитывает обработчик рецепта,
+    # а при удалении пользователя или ингредиента они удаляются каскадом
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is sender
+
+
+def refresh_for_cart(user_id, recipe_id):
+    schedule_cart_totals([user_id], recipe_ingredient_ids(recipe_id))
+
+
+def refresh_for_amount(recipe_id, ingredient_id):
+    schedule_cart_totals(recipe_cart_user_ids(recipe_id), [ingredient_id])
+
+
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=IngredientInRecipe)
+def remember_previous_row(sender, instance, **kwargs):
+    # Запись, изменённая в админке, могла ссылаться на другой рецепт
+    # или ингредиент — их суммы тоже нужно пересчитать
+    instance._previous_row = (
+        sender.objects.filter(pk=instance.pk).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_saved(sender, instance, **kwargs):
+    refresh_for_cart(instance.user_id, instance.recipe_id)
+    previous = getattr(instance, "_previous_row", None)
+    if previous and (previous.user_id, previous.recipe_id) != (
+        instance.user_id,
+        instance.recipe_id,
+    ):
+        refresh_for_cart(previous.user_id, previous.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def cart_deleted(sender, instance, origin=None, **kwargs):
+    if direct_delete(sender, origin):
+        refresh_for_cart(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+def amount_saved(sender, instance, **kwargs):
+    refresh_for_amount(instance.recipe_id, instance.ingredient_id)
+    previous = getattr(instance, "_previous_row", None)
+    if previous and (previous.recipe_id, previous.ingredient_id) != (
+        instance.recipe_id,
+        instance.ingredient_id,
+    ):
+        refresh_for_amount(previous.recipe_id, previous.ingredient_id)
+
+
+@receiver(post_delete, sender=IngredientInRecipe)
+def amount_deleted(sender, instance, origin=None, **kwargs):
+    if direct_delete(sender, origin):
+        refresh_for_amount(instance.recipe_id, instance.ingredient_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    # После удаления корзины и состава рецепта уже не найти
+    instance._cart_totals = (
+        recipe_cart_user_ids(instance),
+        recipe_ingredient_ids(instance),
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    schedule_cart_totals(*instance._cart_totals)
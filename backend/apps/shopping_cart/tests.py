@@ -1,3 +1,129 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.ingredients.models import Ingredient
+from apps.recipes.models import IngredientInRecipe, Recipe
+from config.testing import create_user
+from .models import ShoppingCartTotal
+from .totals import find_cart_total_mismatches
+
+
+class ShoppingCartTotalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("cook")
+        cls.salt = Ingredient.objects.create(name="Соль", measurement_unit="г")
+        cls.sugar = Ingredient.objects.create(name="Сахар", measurement_unit="г")
+        cls.recipes = []
+        for amount in (2, 3):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f"Рецепт {amount}", text="-", cooking_time=5
+            )
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=cls.salt, amount=amount
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def totals(self):
+        return dict(
+            self.user.cart_totals.values_list("ingredient__name", "total_amount")
+        )
+
+    def add_to_cart(self, recipe):
+        url = f"/api/recipes/{recipe.pk}/shopping_cart/"
+        self.assertEqual(self.client.post(url).status_code, 201)
+
+    def test_add_and_remove_keep_totals(self):
+        for recipe in self.recipes:
+            self.add_to_cart(recipe)
+        self.assertEqual(self.totals(), {"Соль": 5})
+
+        self.client.delete(f"/api/recipes/{self.recipes[0].pk}/shopping_cart/")
+        self.assertEqual(self.totals(), {"Соль": 3})
+
+        self.client.delete(f"/api/recipes/{self.recipes[1].pk}/shopping_cart/")
+        self.assertEqual(self.totals(), {})
+
+    def test_recipe_update_refreshes_totals(self):
+        recipe = self.recipes[0]
+        self.add_to_cart(recipe)
+
+        response = self.client.patch(
+            f"/api/recipes/{recipe.pk}/",
+            {
+                "ingredients": [{"id": self.sugar.pk, "amount": 7}],
+                "name": recipe.name,
+                "text": recipe.text,
+                "cooking_time": recipe.cooking_time,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), {"Сахар": 7})
+
+    def test_recipe_delete_refreshes_totals(self):
+        for recipe in self.recipes:
+            self.add_to_cart(recipe)
+
+        self.client.delete(f"/api/recipes/{self.recipes[0].pk}/")
+
+        self.assertEqual(self.totals(), {"Соль": 3})
+        self.assertEqual(find_cart_total_mismatches(), [])
+
+    def test_orm_changes_keep_totals(self):
+        # Изменения в обход API: админка и каскадные удаления
+        for recipe in self.recipes:
+            self.add_to_cart(recipe)
+
+        amount = IngredientInRecipe.objects.get(recipe=self.recipes[0])
+        amount.amount = 10
+        amount.save()
+        self.assertEqual(self.totals(), {"Соль": 13})
+
+        amount.ingredient = self.sugar
+        amount.save()
+        self.assertEqual(self.totals(), {"Соль": 3, "Сахар": 10})
+
+        self.recipes[1].delete()
+        self.assertEqual(self.totals(), {"Сахар": 10})
+        self.assertEqual(find_cart_total_mismatches(), [])
+
+    def test_author_delete_cascades_to_other_carts(self):
+        author = create_user("author")
+        recipe = Recipe.objects.create(
+            author=author, name="Чужой рецепт", text="-", cooking_time=5
+        )
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=self.sugar, amount=7
+        )
+        self.add_to_cart(recipe)
+        self.add_to_cart(self.recipes[0])
+        self.assertEqual(self.totals(), {"Соль": 2, "Сахар": 7})
+
+        author.delete()
+
+        self.assertEqual(self.totals(), {"Соль": 2})
+        self.assertEqual(find_cart_total_mismatches(), [])
+
+        self.user.delete()
+        self.assertFalse(ShoppingCartTotal.objects.exists())
+
+    def test_rebuild_command_heals_drift(self):
+        self.add_to_cart(self.recipes[0])
+        ShoppingCartTotal.objects.update(total_amount=100)
+        self.assertEqual(
+            find_cart_total_mismatches(), [(self.user.pk, self.salt.pk, 2, 100)]
+        )
+
+        call_command("rebuild_cart_totals", stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(find_cart_total_mismatches(), [])
+        self.assertEqual(self.totals(), {"Соль": 2})
@@ -0,0 +1,151 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.recipes.models import IngredientInRecipe
+from apps.users.models import User
+from .models import ShoppingCart, ShoppingCartTotal
+
+# ShoppingCartTotal хранит готовые суммы списка покупок. Любое изменение
+# корзины или состава рецепта в корзине (сигналы в signals.py) пересчитывает
+# затронутые пары (пользователь, ингредиент) из исходных таблиц, поэтому
+# расхождения не накапливаются. Полное восстановление — команда
+# rebuild_cart_totals.
+
+_pending = ContextVar("pending_cart_totals", default=None)
+
+
+def aggregate_cart_totals(amounts):
+    return (
+        amounts.values("recipe__shoppingcarts__user", "ingredient")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+
+
+def build_cart_totals(amounts):
+    return [
+        ShoppingCartTotal(
+            user_id=row["recipe__shoppingcarts__user"],
+            ingredient_id=row["ingredient"],
+            total_amount=row["total"],
+        )
+        for row in aggregate_cart_totals(amounts)
+    ]
+
+
+def refresh_cart_totals(users, ingredients):
+    """Пересчитывает суммы для указанных пользователей и ингредиентов."""
+    users = list(users)
+    ingredients = list(ingredients)
+    if not users or not ingredients:
+        return
+
+    with transaction.atomic():
+        # Блокировка пользователей упорядочивает параллельные пересчёты:
+        # иначе два добавления в корзину вставят одну и ту же пару
+        list(
+            User.objects.select_for_update()
+            .filter(pk__in=users)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        ShoppingCartTotal.objects.filter(
+            user__in=users, ingredient__in=ingredients
+        ).delete()
+        ShoppingCartTotal.objects.bulk_create(
+            build_cart_totals(
+                IngredientInRecipe.objects.filter(
+                    ingredient__in=ingredients,
+                    recipe__shoppingcarts__user__in=users,
+                )
+            )
+        )
+
+
+def schedule_cart_totals(users, ingredients):
+    """Пересчитывает суммы сразу или в конце блока batch_cart_totals."""
+    pending = _pending.get()
+    if pending is None:
+        refresh_cart_totals(users, ingredients)
+    else:
+        pending[0].update(users)
+        pending[1].update(ingredients)
+
+
+@contextmanager
+def batch_cart_totals():
+    """Объединяет пересчёты внутри блока в один в его конце."""
+    if _pending.get() is not None:
+        yield
+        return
+
+    pending = (set(), set())
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    refresh_cart_totals(*pending)
+
+
+def recipe_ingredient_ids(recipe):
+    return set(
+        IngredientInRecipe.objects.filter(recipe=recipe).values_list(
+            "ingredient", flat=True
+        )
+    )
+
+
+def recipe_cart_user_ids(recipe):
+    return set(
+        ShoppingCart.objects.filter(recipe=recipe).values_list("user", flat=True)
+    )
+
+
+def rebuild_cart_totals(users=None):
+    """Полностью пересобирает суммы (для всех или указанных пользователей)."""
+    totals = ShoppingCartTotal.objects.all()
+    amounts = IngredientInRecipe.objects.filter(recipe__shoppingcarts__isnull=False)
+    if users is not None:
+        totals = totals.filter(user__in=users)
+        amounts = amounts.filter(recipe__shoppingcarts__user__in=users)
+
+    with transaction.atomic():
+        totals.delete()
+        created = ShoppingCartTotal.objects.bulk_create(
+            build_cart_totals(amounts), batch_size=1000
+        )
+    return len(created)
+
+
+def find_cart_total_mismatches(users=None):
+    """Возвращает пары (пользователь, ингредиент, ожидаемо, сохранено) с расхождениями."""
+    totals = ShoppingCartTotal.objects.all()
+    amounts = IngredientInRecipe.objects.filter(recipe__shoppingcarts__isnull=False)
+    if users is not None:
+        totals = totals.filter(user__in=users)
+        amounts = amounts.filter(recipe__shoppingcarts__user__in=users)
+
+    expected = {
+        (row["recipe__shoppingcarts__user"], row["ingredient"]): row["total"]
+        for row in aggregate_cart_totals(amounts)
+    }
+    stored = {
+        (user, ingredient): total
+        for user, ingredient, total in totals.values_list(
+            "user", "ingredient", "total_amount"
+        )
+    }
+    return sorted(
+        (
+            user,
+            ingredient,
+            expected.get((user, ingredient)),
+            stored.get((user, ingredient)),
+        )
+        for user, ingredient in expected.keys() | stored.keys()
+        if expected.get((user, ingredient)) != stored.get((user, ingredient))
+    )
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_user_followers_count_user_recipes_count"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="subscription",
+            options={
+                "ordering": ("-id",),
+                "verbose_name": "Подписка",
+                "verbose_name_plural": "Подписки",
+            },
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="followers",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Автор",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="subscriber",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="subscriptions",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Подписчик",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["author", "subscriber"], name="subscription_author_idx"
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 
+from config.counters import DenormalizedCountersMixin
 from config.constants import (
     USER_AVATAR_UPLOAD_TO,
     USER_EMAIL_MAX_LENGTH,
@@ -12,7 +13,9 @@ from config.constants import (
 )
 
 
-class User(AbstractUser):
+class User(DenormalizedCountersMixin, AbstractUser):
+    counter_fields = ("recipes_count", "followers_count")
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
 
@@ -41,6 +44,13 @@ class User(AbstractUser):
         upload_to=USER_AVATAR_UPLOAD_TO,
         blank=True,
     )
+    # Счётчики поддерживаются при изменении связей, см. команду recount
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество подписчиков"
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -56,12 +66,14 @@ class Subscription(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name="Автор",
+        db_index=False,  # покрыт индексом (author, subscriber)
         related_name="followers",  # user.followers — пользователи, подписанные на этого автора
     )
     subscriber = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name="Подписчик",
+        db_index=False,  # покрыт уникальным индексом (subscriber, author)
         related_name="subscriptions",  # user.subscriptions — его подписки на авторов
     )
 
@@ -73,7 +85,13 @@ class Subscription(models.Model):
                 fields=["subscriber", "author"], name="unique_subscription"
             )
         ]
-        ordering = ("author__username",)
+        indexes = [
+            # Подписчики автора: followers_count, удаление автора
+            models.Index(
+                fields=["author", "subscriber"], name="subscription_author_idx"
+            ),
+        ]
+        ordering = ("-id",)
 
     def __str__(self):
         return f"{self.subscriber} подписан на {self.author}"
@@ -1,15 +1,28 @@
 from rest_framework import serializers
 
+from config.constants import USER_AVATAR_RENDITIONS
 from config.fields import Base64ImageField
+from config.images import rendition_urls
 from .models import Subscription, User
 from djoser.serializers import UserCreateSerializer
 
 
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get("recipes_limit")
+    if recipes_limit and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+def expands_recipes(request):
+    return "recipes" in request.query_params.get("expand", "").split(",")
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(use_url=True)
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -26,20 +39,30 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj) -> bool:
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+
         user = self.context.get("request").user
         if not user.is_authenticated:
             return False
         return Subscription.objects.filter(subscriber=user, author=obj).exists()
 
     def get_recipes(self, obj):
-        from apps.recipes.serializers import RecipeSerializer
+        from apps.recipes.serializers import ShortRecipeSerializer
 
         request = self.context.get("request")
-        recipes = obj.recipes.all()
-        return RecipeSerializer(recipes, many=True, context={"request": request}).data
+        # Рецепты заранее загружены в UserProfileViewSet.with_recipes
+        recipes = getattr(obj, "prefetched_recipes", None)
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        if recipes is None:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(request)
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
+
+        return ShortRecipeSerializer(
+            recipes, many=True, context={"request": request}
+        ).data
 
 
 class CreateUserProfileSerializer(UserCreateSerializer):
@@ -63,24 +86,9 @@ class UserProfileAvatarSerializer(serializers.ModelSerializer):
 
 
 class SubscriptionSerializer(UserProfileSerializer):
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source="recipes.count", read_only=True)
-
     class Meta(UserProfileSerializer.Meta):
         fields = UserProfileSerializer.Meta.fields
 
-    def get_recipes(self, obj):
-        from apps.recipes.serializers import ShortRecipeSerializer
-
-        request = self.context.get("request")
-        recipes = obj.recipes.all()
-        recipes_limit = request.query_params.get("recipes_limit")
-        if recipes_limit and recipes_limit.isdigit():
-            recipes = recipes[: int(recipes_limit)]
-        return ShortRecipeSerializer(
-            recipes, many=True, context={"request": request}
-        ).data
-
 
 class CreateSubscriptionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -103,6 +111,7 @@ class CreateSubscriptionSerializer(serializers.ModelSerializer):
 class UserShortSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(use_url=True)
+    avatar_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -114,10 +123,19 @@ class UserShortSerializer(serializers.ModelSerializer):
             "email",
             "is_subscribed",
             "avatar",
+            "avatar_renditions",
         )
 
     def get_is_subscribed(self, obj) -> bool:
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+
         user = self.context.get("request").user
         if not user.is_authenticated:
             return False
         return Subscription.objects.filter(subscriber=user, author=obj).exists()
+
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(
+            obj.avatar, USER_AVATAR_RENDITIONS, self.context.get("request")
+        )
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from config.constants import USER_AVATAR_RENDITIONS
+from config.counters import change_counter
+from config.images import schedule_renditions
+from config.pagination import invalidate_cached_counts
+from .models import Subscription, User
+
+# Поля пользователя, которые попадают в закэшированные ответы
+CACHED_USER_FIELDS = {"username", "first_name", "last_name", "email", "avatar"}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        invalidate_cached_counts("users")
+    if update_fields is None or CACHED_USER_FIELDS & set(update_fields):
+        bump_cache_version("users")
+    if update_fields is None or "avatar" in update_fields:
+        schedule_renditions(instance.avatar, USER_AVATAR_RENDITIONS, "users")
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_cached_counts("users")
+    bump_cache_version("users")
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User.objects.filter(pk=instance.author_id), "followers_count", 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    change_counter(User.objects.filter(pk=instance.author_id), "followers_count", -1)
@@ -1,3 +1,199 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.recipes.models import Recipe
+from config.images import RENDITION_EXTENSION
+from config.testing import create_user, image_data_url
+from .models import Subscription, User
+
+
+class SubscriptionsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("subscriber")
+        for i in range(6):
+            author = create_user(f"author{i}")
+            Recipe.objects.bulk_create(
+                Recipe(author=author, name=f"Рецепт {j}", text="-", cooking_time=5)
+                for j in range(4)
+            )
+            Subscription.objects.create(subscriber=cls.user, author=author)
+        call_command("recount", stdout=StringIO())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        _, small = self.get("/api/users/subscriptions/?limit=1&recipes_limit=2")
+        _, large = self.get("/api/users/subscriptions/?limit=6&recipes_limit=2")
+
+        self.assertEqual(small, large)
+
+    def test_recipes_limit_and_count(self):
+        response, _ = self.get("/api/users/subscriptions/?recipes_limit=2")
+
+        for author in response.json()["results"]:
+            self.assertEqual(len(author["recipes"]), 2)
+            self.assertEqual(author["recipes_count"], 4)
+            self.assertTrue(author["is_subscribed"])
+
+    def test_without_recipes_limit_returns_all_recipes(self):
+        response, _ = self.get("/api/users/subscriptions/")
+
+        for author in response.json()["results"]:
+            self.assertEqual(len(author["recipes"]), 4)
+
+
+class UserListRecipesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            author = create_user(f"author{i}")
+            Recipe.objects.bulk_create(
+                Recipe(author=author, name=f"Рецепт {j}", text="-", cooking_time=5)
+                for j in range(3)
+            )
+        call_command("recount", stdout=StringIO())
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_list_does_not_render_recipes_by_default(self):
+        response, _ = self.get("/api/users/")
+
+        for user in response.json()["results"]:
+            self.assertNotIn("recipes", user)
+
+    def test_expand_recipes_uses_short_recipes_with_limit(self):
+        response, _ = self.get("/api/users/?expand=recipes&recipes_limit=1")
+
+        for user in response.json()["results"]:
+            self.assertEqual(len(user["recipes"]), 1)
+            self.assertEqual(user["recipes_count"], 3)
+            self.assertNotIn("ingredients", user["recipes"][0])
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        _, small = self.get("/api/users/?limit=1")
+        _, large = self.get("/api/users/?limit=5")
+        _, expanded_small = self.get("/api/users/?limit=1&expand=recipes")
+        _, expanded_large = self.get("/api/users/?limit=5&expand=recipes")
+
+        self.assertEqual(small, large)
+        self.assertEqual(expanded_small, expanded_large)
+
+    def test_retrieve_expand_recipes(self):
+        author = User.objects.get(username="author0")
+        response, _ = self.get(f"/api/users/{author.pk}/?expand=recipes")
+
+        self.assertEqual(len(response.json()["recipes"]), 3)
+        self.assertEqual(response.json()["recipes_count"], 3)
+
+
+class FollowersCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("subscriber")
+        cls.author = create_user("author")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_subscribe_and_unsubscribe_update_followers_count(self):
+        url = f"/api/users/{self.author.pk}/subscribe/"
+
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+
+class UserCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            create_user(f"user{i}")
+
+    def test_cursor_walks_users_in_username_order(self):
+        usernames = []
+        url = "/api/users/?cursor=&limit=2"
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn("count", response.json())
+            usernames += [user["username"] for user in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertEqual(usernames, [f"user{i}" for i in range(5)])
+
+    def test_limit_offset_contract_is_default(self):
+        response = self.client.get("/api/users/?limit=2&offset=2")
+
+        self.assertEqual(response.json()["count"], 5)
+        self.assertEqual(response.json()["results"][0]["username"], "user2")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AvatarRenditionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("user")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_avatar_rendition_is_square_thumbnail(self):
+        with (
+            patch("config.images.executor.submit", side_effect=lambda fn, *a: fn(*a)),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.put(
+                "/api/users/me/avatar/",
+                {"avatar": image_data_url((300, 200))},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+
+        user = self.client.get(f"/api/users/{self.user.pk}/").json()
+        self.assertTrue(
+            user["avatar_renditions"]["small"].endswith(f".small.{RENDITION_EXTENSION}")
+        )
+
+    def test_avatar_multipart_upload(self):
+        output = BytesIO()
+        Image.new("RGB", (10, 10)).save(output, "PNG")
+
+        response = self.client.put(
+            "/api/users/me/avatar/",
+            {"avatar": SimpleUploadedFile("me.png", output.getvalue(), "image/png")},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["avatar"].endswith(".png"))
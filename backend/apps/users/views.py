@@ -1,17 +1,24 @@
+from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from rest_framework.pagination import LimitOffsetPagination
 from djoser.views import UserViewSet
 
+from apps.recipes.fragments import invalidate_user_relations
+from apps.recipes.models import Recipe
+from config.pagination import UserPagination
 from .models import User, Subscription
 from .serializers import (
     UserProfileAvatarSerializer,
+    UserProfileSerializer,
     UserShortSerializer,
     SubscriptionSerializer,
     CreateSubscriptionSerializer,
+    expands_recipes,
+    get_recipes_limit,
 )
 
 
@@ -19,7 +26,50 @@ class UserProfileViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserShortSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = UserPagination
+    replica_reads = True
+    count_cache_namespace = "users"
+
+    def get_serializer_class(self):
+        # Профиль с рецептами отдаётся только по явному ?expand=recipes
+        if self.action in ("list", "retrieve") and expands_recipes(self.request):
+            return UserProfileSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        if expands_recipes(self.request):
+            return self.with_recipes(queryset)
+        return self.with_subscription_flag(queryset)
+
+    def with_subscription_flag(self, queryset):
+        user = self.request.user
+
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(subscriber=user, author=OuterRef("pk"))
+            )
+        )
+
+    def with_recipes(self, queryset):
+        """Профили с числом рецептов и последними рецептами за один запрос."""
+        recipes = Recipe.objects.only("id", "name", "image", "cooking_time", "author")
+
+        # Рецепты всех авторов страницы выбираются одним запросом (ROW_NUMBER())
+        recipes_limit = get_recipes_limit(self.request)
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+
+        return self.with_subscription_flag(queryset).prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="prefetched_recipes")
+        )
 
     @action(
         detail=False,
@@ -28,7 +78,10 @@ class UserProfileViewSet(UserViewSet):
         url_path="me",
     )
     def me(self, request):
-        serializer = UserShortSerializer(request.user, context={"request": request})
+        serializer_class = (
+            UserProfileSerializer if expands_recipes(request) else UserShortSerializer
+        )
+        serializer = serializer_class(request.user, context={"request": request})
         return Response(serializer.data)
 
     @action(
@@ -56,7 +109,7 @@ class UserProfileViewSet(UserViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         if request.user.avatar:
-            request.user.avatar.delete()
+            # Файл удаляется сигналом, если на него больше никто не ссылается
             request.user.avatar = None
             request.user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -68,7 +121,9 @@ class UserProfileViewSet(UserViewSet):
         url_path="subscriptions",
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(followers__subscriber=request.user)
+        queryset = self.with_recipes(
+            User.objects.filter(followers__subscriber=request.user)
+        )
         page = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(
             page, many=True, context={"request": request}
@@ -96,7 +151,9 @@ class UserProfileViewSet(UserViewSet):
                 context={"request": request},
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                invalidate_user_relations(request.user.pk)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         subscription = Subscription.objects.filter(
@@ -108,5 +165,7 @@ class UserProfileViewSet(UserViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        subscription.delete()
+        with transaction.atomic():
+            subscription.delete()
+            invalidate_user_relations(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
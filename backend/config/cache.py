@@ -0,0 +1,172 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from .constants import RESPONSE_CACHE_TIMEOUT
+from .renderers import ORJSONRenderer
+from .routers import primary_reads
+
+
+def cache_version_key(namespace):
+    return f"cache-version:{namespace}"
+
+
+def get_cache_version(namespace):
+    return cache.get(cache_version_key(namespace), 0)
+
+
+def get_cache_versions(namespaces):
+    keys = [cache_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+async def aget_cache_versions(namespaces):
+    keys = [cache_version_key(namespace) for namespace in namespaces]
+    versions = await cache.aget_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump_cache_version(namespace):
+    """Делает устаревшими все ключи, построенные с версией namespace."""
+    transaction.on_commit(
+        lambda: cache.set(cache_version_key(namespace), time.time_ns(), None)
+    )
+
+
+def normalized_query(request, exclude=()):
+    """Отсортированные непустые параметры запроса без параметров из exclude."""
+    return sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        if key not in exclude
+        for value in values
+        if value
+    )
+
+
+def query_digest(params):
+    return hashlib.md5(urlencode(params).encode()).hexdigest()
+
+
+def response_cache_key(request, versions):
+    digest = query_digest(
+        [
+            ("host", request.get_host()),
+            ("path", request.path),
+            *normalized_query(request),
+        ]
+    )
+    return f"response:{':'.join(map(str, versions))}:{digest}"
+
+
+class AnonymousResponseCacheMixin:
+    """Кэширует ответы анонимным пользователям с поддержкой ETag.
+
+    Ключ строится из пути, нормализованных параметров запроса и версий
+    пространств response_cache_namespaces, которые увеличиваются сигналами
+    при изменении данных (см. bump_cache_version).
+    """
+
+    response_cache_namespaces = ()
+
+    def get_response_cache_key(self, request):
+        return response_cache_key(
+            request, get_cache_versions(self.response_cache_namespaces)
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+
+        if cached is None:
+            with primary_reads():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = ORJSONRenderer().render(response.data)
+            cached = (response.data, f'"{hashlib.md5(content).hexdigest()}"')
+            cache.set(key, cached, RESPONSE_CACHE_TIMEOUT)
+
+        data, etag = cached
+        if etag in request.headers.get("If-None-Match", ""):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
+# Ограниченный пул для threaded_view: пул по умолчанию asyncio растёт до
+# min(32, CPU + 4) потоков и не согласован с размером пула соединений
+view_executor = ThreadPoolExecutor(
+    max_workers=settings.SYNC_VIEW_THREADS, thread_name_prefix="sync-views"
+)
+
+
+def threaded_view(view):
+    """Синхронный view для ASGI, выполняемый в view_executor.
+
+    С thread_sensitive=True все синхронные вызовы процесса идут по очереди
+    через один поток, и запросы к базе сериализуются. Обработчик запроса
+    закрывает соединения только в этом общем потоке, поэтому соединения
+    потоков пула возвращаются здесь.
+    """
+
+    def run(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False, executor=view_executor)
+
+
+def async_cached_view(view):
+    """Асинхронная обёртка view с AnonymousResponseCacheMixin для ASGI.
+
+    Анонимный GET, уже лежащий в кэше, отдаётся без перехода в поток;
+    остальные запросы выполняет исходный синхронный view.
+    """
+    sync_view = threaded_view(view)
+    namespaces = view.cls.response_cache_namespaces
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if (
+            request.method == "GET"
+            and "Authorization" not in request.headers
+            and not kwargs.get("format")
+        ):
+            key = response_cache_key(request, await aget_cache_versions(namespaces))
+            cached = await cache.aget(key)
+            if cached is not None:
+                data, etag = cached
+                if etag in request.headers.get("If-None-Match", ""):
+                    response = HttpResponseNotModified()
+                else:
+                    response = HttpResponse(
+                        ORJSONRenderer().render(data), content_type="application/json"
+                    )
+                response["ETag"] = etag
+                patch_vary_headers(response, ("Accept", "Authorization"))
+                return response
+
+        return await sync_view(request, *args, **kwargs)
+
+    return async_view
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Кэши, которые видит только один процесс
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared():
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Версии кэша, закрепление за основной базой и персональные множества
+    должны быть видны всем воркерам gunicorn."""
+    if cache_is_shared():
+        return []
+    warnings = [
+        Warning(
+            "Кэш по умолчанию локален для процесса: инвалидация и закрепление "
+            "за основной базой не дойдут до других воркеров.",
+            hint="Задайте CACHE_URL, например redis://redis:6379/0.",
+            id="foodgram.W001",
+        )
+    ]
+    if settings.DATABASE_REPLICAS:
+        warnings.append(
+            Warning(
+                "DATABASE_REPLICAS задан, но без общего кэша закрепление за "
+                "основной базой не работает: всё чтение идёт в основную базу.",
+                hint="Задайте CACHE_URL, например redis://redis:6379/0.",
+                id="foodgram.W002",
+            )
+        )
+    return warnings
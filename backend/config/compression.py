@@ -0,0 +1,137 @@
+import gzip
+import zlib
+
+import brotli
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .constants import RESPONSE_COMPRESSION_LEVELS, RESPONSE_COMPRESSION_MIN_SIZE
+
+# Сжатые копии для nginx (gzip_static/brotli_static) и ответов API:
+# кодировка -> (расширение файла, функция сжатия); порядок задаёт
+# предпочтение при равном q в Accept-Encoding
+ENCODINGS = {
+    "br": (".br", lambda data, level: brotli.compress(data, quality=level)),
+    "gzip": (".gz", lambda data, level: gzip.compress(data, level, mtime=0)),
+}
+# Максимальные уровни — для однократного сжатия при сборке
+MAX_LEVELS = {"br": 11, "gzip": 9}
+
+# На лету сжимаются только ответы API: JSON и выгрузки списка покупок.
+# HTML админки и browsable API с CSRF-токеном не сжимается (BREACH), а
+# статику nginx отдаёт из заранее сжатых копий
+COMPRESSED_PATHS = ("/api/",)
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/csv")
+
+
+def compress(data, encoding, level=None):
+    compressor = ENCODINGS[encoding][1]
+    return compressor(data, MAX_LEVELS[encoding] if level is None else level)
+
+
+def stream_compressor(encoding, level):
+    """Пара функций (сжать часть, завершить поток).
+
+    Каждая часть сбрасывается сразу, чтобы клиент получал данные по мере
+    генерации, а не после окончания потока.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        return (
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def compress_stream(chunks, encoding, level):
+    process, finish = stream_compressor(encoding, level)
+    for chunk in chunks:
+        if chunk:
+            yield process(chunk)
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding, level):
+    process, finish = stream_compressor(encoding, level)
+    async for chunk in chunks:
+        if chunk:
+            yield process(chunk)
+    yield finish()
+
+
+def negotiate(accept_encoding):
+    """Поддерживаемая кодировка с наибольшим q из Accept-Encoding или None."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip в зависимости от Accept-Encoding.
+
+    Сжимаются только ответы под COMPRESSED_PATHS с типами из
+    COMPRESSIBLE_TYPES. Ответы меньше RESPONSE_COMPRESSION_MIN_SIZE и уже
+    сжатые данные отдаются как есть; потоковые ответы сжимаются по частям.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not request.path.startswith(COMPRESSED_PATHS)
+            or response.has_header("Content-Encoding")
+            or "no-transform" in response.get("Cache-Control", "")
+            or not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < RESPONSE_COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        level = RESPONSE_COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(
+                response.streaming_content, encoding, level
+            )
+            if response.has_header("Content-Length"):
+                del response["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Сжатое тело побайтно отличается от исходного
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
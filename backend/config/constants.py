@@ -12,3 +12,21 @@ USER_LAST_NAME_MAX_LENGTH = 150
 USER_AVATAR_UPLOAD_TO = "users/"
 INGREDIENT_INLINE_MIN_AMOUNT = 1
 MAIN_PAGE_RECORDS_LIMIT = 6
+COUNT_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_THRESHOLD = 10000
+RESPONSE_CACHE_TIMEOUT = 300
+INGREDIENT_SEARCH_RESULTS_LIMIT = 50
+INGREDIENT_INDEX_TTL = 300
+REPLICA_PIN_TIMEOUT = 5
+REPLICA_RETRY_TIMEOUT = 30
+# Рендиции изображений: имя -> (ширина, высота, обрезать до размера)
+RECIPE_IMAGE_RENDITIONS = {"thumb": (480, 480, False), "medium": (1200, 1200, False)}
+USER_AVATAR_RENDITIONS = {"small": (96, 96, True)}
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITION_WORKERS = 2
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+MEDIA_GC_MIN_AGE = 60 * 60
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+# Уровни сжатия ответов на лету: быстрее максимальных при близкой степени сжатия
+RESPONSE_COMPRESSION_LEVELS = {"br": 4, "gzip": 6}
+INGREDIENT_CATALOGUE_MAX_AGE = 60
@@ -0,0 +1,35 @@
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+
+
+class DenormalizedCountersMixin:
+    """Не даёт save() перезаписать счётчики устаревшими значениями из памяти.
+
+    Счётчики меняются только F()-обновлениями рядом с изменением связей,
+    поэтому при сохранении существующей записи они исключаются из UPDATE.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик на delta, не опуская его ниже нуля."""
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def deleted_with(origin, model):
+    """Удаление началось с записи model (post_delete origin), а не с самой связи.
+
+    Счётчик удаляемой каскадом записи менять незачем.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, model)
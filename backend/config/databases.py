@@ -0,0 +1,60 @@
+# Настройки баз данных из окружения. Вынесены из settings.py, чтобы их можно
+# было проверить тестами с другими переменными окружения.
+
+POSTGRESQL_ENGINE = "django.db.backends.postgresql"
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+
+
+def database_settings(env, default_url, pool_max_size):
+    """DATABASES и алиасы реплик.
+
+    DATABASE_URL — основная база, DATABASE_REPLICA_URLS — реплики только
+    для чтения через запятую. pool_max_size — размер пула соединений
+    PostgreSQL по умолчанию.
+    """
+    databases = {"default": env.db_url("DATABASE_URL", default=default_url)}
+
+    replicas = []
+    for number, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), 1):
+        alias = f"replica{number}"
+        databases[alias] = env.db_url_config(url)
+        databases[alias]["TEST"] = {"MIRROR": "default"}
+        replicas.append(alias)
+
+    for database in databases.values():
+        if database["ENGINE"] == POSTGRESQL_ENGINE:
+            configure_postgresql(env, database, pool_max_size)
+    if databases["default"]["ENGINE"] == SQLITE_ENGINE:
+        configure_sqlite(env, databases["default"])
+    return databases, replicas
+
+
+def configure_postgresql(env, database, pool_max_size):
+    database["CONN_HEALTH_CHECKS"] = True
+    if not env.bool("DATABASE_POOL", default=True):
+        database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+        return
+
+    # Пул psycopg 3 не совместим с постоянными соединениями CONN_MAX_AGE
+    database["CONN_MAX_AGE"] = 0
+    database.setdefault("OPTIONS", {})["pool"] = {
+        "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=1),
+        "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=pool_max_size),
+        "timeout": env.int("DATABASE_POOL_TIMEOUT", default=10),
+    }
+
+
+def configure_sqlite(env, database):
+    # WAL не блокирует чтение во время записи; IMMEDIATE берёт блокировку
+    # записи в начале транзакции, и конкурирующие запросы ждут busy_timeout
+    # вместо ошибки "database is locked"
+    database.setdefault("OPTIONS", {}).update(
+        {
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                f"PRAGMA busy_timeout={env.int('SQLITE_BUSY_TIMEOUT', default=5000)}"
+            ),
+        }
+    )
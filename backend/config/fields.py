@@ -1,21 +1,103 @@
 import base64
+import binascii
 import uuid
+
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework import serializers
 
+from .constants import IMAGE_UPLOAD_MAX_SIZE
+
+# Длина кусков base64 при потоковом декодировании
+BASE64_CHUNK_SIZE = 64 * 1024
+# Переводы строк из base64.encodebytes() и других кодировщиков с переносами
+BASE64_WHITESPACE = " \t\r\n"
+
+# Расширение файла по формату, который определил Pillow
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "MPO": "jpg"}
+
+
+def decoded_size(encoded):
+    # Считаются только символы алфавита, без пробелов и переводов строк
+    chars = len(encoded) - sum(encoded.count(char) for char in BASE64_WHITESPACE)
+    padding = "".join(encoded[-16:].split())[-2:].count("=")
+    return chars * 3 // 4 - padding
+
+
+def decode_chunks(encoded):
+    """Декодирует base64 по частям, пропуская пробелы и переводы строк.
+
+    В каждой части декодируется число символов, кратное 4; остаток
+    переносится в следующую часть.
+    """
+    rest = ""
+    for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+        chunk = rest + "".join(encoded[start : start + BASE64_CHUNK_SIZE].split())
+        usable = len(chunk) - len(chunk) % 4
+        rest = chunk[usable:]
+        yield base64.b64decode(chunk[:usable])
+    if rest:
+        raise binascii.Error("Incorrect padding")
+
+
+class DecodedImageFile(TemporaryUploadedFile):
+    # Хранилище переносит временный файл на место; close() это учитывает,
+    # а финализатор tempfile — нет
+    def __del__(self):
+        self.close()
+
 
 class Base64ImageField(serializers.ImageField):
+    """Изображение строкой data:image/...;base64 или файлом multipart/form-data.
+
+    Размер проверяется до декодирования; большие изображения декодируются
+    по частям во временный файл, а не в память.
+    """
+
+    default_error_messages = {
+        "too_large": "Размер изображения не должен превышать {max_size} МБ.",
+        "invalid_base64": "Некорректные данные base64.",
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
+            data = self.decode(data)
+        elif hasattr(data, "size"):
+            self.check_size(data.size)
+
+        image = super().to_internal_value(data)
+        # Имя и расширение клиента или data URL не используются: nginx отдаёт
+        # файл по расширению, поэтому оно берётся из формата, найденного Pillow
+        image.name = self.file_name(image.image.format)
+        return image
+
+    def check_size(self, size):
+        if size > IMAGE_UPLOAD_MAX_SIZE:
+            self.fail("too_large", max_size=IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024))
+
+    @staticmethod
+    def file_name(image_format):
+        ext = IMAGE_EXTENSIONS.get(image_format, image_format.lower())
+        return f"{uuid.uuid4()}.{ext}"
 
-            if ext == "jpeg":
-                ext = "jpg"
+    def decode(self, data):
+        header, _, encoded = data.partition(";base64,")
+        size = decoded_size(encoded)
+        self.check_size(size)
+        # Временное имя для проверки ImageField, окончательное — по формату
+        file_name = f"image.{header.split('/')[-1]}"
 
-            file_name = f"{uuid.uuid4()}.{ext}"
-            decoded_file = base64.b64decode(imgstr)
+        try:
+            if size <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+                return ContentFile(base64.b64decode(encoded), name=file_name)
 
-            return ContentFile(decoded_file, name=file_name)
+            upload = DecodedImageFile(file_name, header[5:], size, None)
+            for chunk in decode_chunks(encoded):
+                upload.write(chunk)
+        except (binascii.Error, ValueError):
+            self.fail("invalid_base64")
 
-        return super().to_internal_value(data)
+        upload.size = upload.tell()
+        upload.seek(0)
+        return upload
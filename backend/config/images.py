@@ -0,0 +1,146 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .cache import bump_cache_version
+from .constants import (
+    IMAGE_RENDITION_QUALITY,
+    IMAGE_RENDITION_WORKERS,
+    RESPONSE_CACHE_TIMEOUT,
+)
+from .storage import RENDITIONS_DIR
+
+# Уменьшенные копии изображений (рендиции) строятся в фоновом потоке после
+# сохранения модели и лежат в отдельном каталоге:
+# images/ab/<хеш>.jpg -> renditions/images/ab/<хеш>.thumb.webp
+# Пока рендиция не готова, вместо неё отдаётся URL оригинала. Готовность
+# отмечается в кэше по имени оригинала, чтобы сериализаторы не обращались
+# к хранилищу за каждой рендицией.
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FORMAT, RENDITION_EXTENSION = (
+    ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=IMAGE_RENDITION_WORKERS, thread_name_prefix="renditions"
+)
+
+
+def rendition_prefix(name):
+    return posixpath.join(RENDITIONS_DIR, posixpath.splitext(name)[0] + ".")
+
+
+def rendition_name(name, rendition):
+    return f"{rendition_prefix(name)}{rendition}.{RENDITION_EXTENSION}"
+
+
+def ready_key(name):
+    return f"renditions-ready:{posixpath.splitext(name)[0]}"
+
+
+def ready_renditions(field_file, renditions):
+    """Множество готовых рендиций поля по флагу в кэше.
+
+    Если флага нет (вытеснен или поставлен в другом процессе с локальным
+    кэшем), готовность один раз проверяется по хранилищу.
+    """
+    key = ready_key(field_file.name)
+    ready = cache.get(key)
+    if ready is None:
+        storage = field_file.storage
+        ready = frozenset(
+            rendition
+            for rendition in renditions
+            if storage.exists(rendition_name(field_file.name, rendition))
+        )
+        # Имена оригиналов зависят от содержимого, поэтому полный набор
+        # не устаревает; неполный перепроверяется
+        complete = ready.issuperset(renditions)
+        cache.set(key, ready, None if complete else RESPONSE_CACHE_TIMEOUT)
+    return ready
+
+
+def forget_renditions(name):
+    cache.delete(ready_key(name))
+
+
+def rendition_urls(field_file, renditions, request=None):
+    """URL рендиций поля; для ещё не готовых — URL оригинала."""
+    if not field_file:
+        return None
+
+    ready = ready_renditions(field_file, renditions)
+    urls = {}
+    for rendition in renditions:
+        if rendition in ready:
+            url = field_file.storage.url(rendition_name(field_file.name, rendition))
+        else:
+            url = field_file.url
+        urls[rendition] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def render(image, size, crop):
+    if crop:
+        image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+
+    # Сохраняется только растр: EXIF, ICC и прочие метаданные отбрасываются
+    if RENDITION_FORMAT == "JPEG" or image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB" if RENDITION_FORMAT == "JPEG" else "RGBA")
+    output = BytesIO()
+    image.save(output, RENDITION_FORMAT, quality=IMAGE_RENDITION_QUALITY)
+    return output.getvalue()
+
+
+def generate_renditions(storage, name, renditions, namespace):
+    try:
+        with storage.open(name) as original:
+            image = Image.open(original)
+            # Поворот по EXIF применяется до того, как метаданные потеряются
+            image = ImageOps.exif_transpose(image)
+            image.load()
+
+        for rendition, (width, height, crop) in renditions.items():
+            target = rendition_name(name, rendition)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(render(image, (width, height), crop)))
+    except Exception:
+        logger.exception("Не удалось построить рендиции для %s", name)
+        return
+
+    cache.set(ready_key(name), frozenset(renditions), None)
+    # Закэшированные ответы содержат URL оригинала вместо рендиций
+    bump_cache_version(namespace)
+
+
+def schedule_renditions(field_file, renditions, namespace):
+    """Ставит построение недостающих рендиций в очередь после коммита."""
+    if not field_file:
+        return
+
+    if ready_renditions(field_file, renditions).issuperset(renditions):
+        return
+
+    transaction.on_commit(
+        partial(
+            executor.submit,
+            generate_renditions,
+            field_file.storage,
+            field_file.name,
+            renditions,
+            namespace,
+        )
+    )
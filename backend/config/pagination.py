@@ -1,7 +1,169 @@
-from rest_framework.pagination import PageNumberPagination
-from .constants import MAIN_PAGE_RECORDS_LIMIT
+from functools import partial
 
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+    PageNumberPagination,
+)
+from .cache import (
+    bump_cache_version,
+    get_cache_version,
+    normalized_query,
+    query_digest,
+)
+from .constants import (
+    COUNT_CACHE_TIMEOUT,
+    COUNT_ESTIMATE_THRESHOLD,
+    MAIN_PAGE_RECORDS_LIMIT,
+)
 
-class MainPagePagination(PageNumberPagination):
+
+def invalidate_cached_counts(namespace):
+    bump_cache_version(f"count:{namespace}")
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы по статистике планировщика PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+
+    # Маленькие и ещё не проанализированные таблицы считаем точно
+    if row is None or row[0] < COUNT_ESTIMATE_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который сначала спрашивает количество у get_count."""
+
+    def __init__(self, object_list, per_page, *args, get_count=None, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.get_count = get_count
+
+    @cached_property
+    def count(self):
+        count = None if self.get_count is None else self.get_count(self.object_list)
+        if count is None:
+            return super().count
+        return count
+
+
+class CachedCountMixin:
+    """Кэширует COUNT(*) списка по нормализованному набору фильтров.
+
+    Кэширование включается атрибутом count_cache_namespace у view и работает
+    только для действия list. Запросы с фильтрами, зависящими от пользователя
+    (count_cache_private_params у view), считаются точно. Ключи версионируются:
+    invalidate_cached_counts(namespace) сбрасывает все счётчики пространства.
+    """
+
+    pagination_query_params = ("page", "limit", "offset", "cursor")
+
+    def get_count_cache_key(self, request, view):
+        namespace = getattr(view, "count_cache_namespace", None)
+        if namespace is None or getattr(view, "action", None) != "list":
+            return None
+
+        params = normalized_query(request, exclude=self.pagination_query_params)
+        private_params = getattr(view, "count_cache_private_params", ())
+        if request.user.is_authenticated and any(
+            key in private_params for key, _ in params
+        ):
+            return None
+
+        version = get_cache_version(f"count:{namespace}")
+        return f"count:{namespace}:{version}:{query_digest(params)}", not params
+
+    def get_cached_count(self, queryset, request, view):
+        cache_key = self.get_count_cache_key(request, view)
+        if cache_key is None:
+            return None
+
+        key, unfiltered = cache_key
+        count = cache.get(key)
+        if count is None:
+            count = estimate_count(queryset) if unfiltered else None
+            if count is None:
+                count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class RecipeCursorPagination(CursorPagination):
+    # Позиция курсора — created; id упорядочивает рецепты с одинаковой датой
+    ordering = ("-created", "-id")
+    page_size = MAIN_PAGE_RECORDS_LIMIT
+    page_size_query_param = "limit"
+
+
+class UserCursorPagination(CursorPagination):
+    ordering = ("username",)
+    page_size = MAIN_PAGE_RECORDS_LIMIT
+    page_size_query_param = "limit"
+
+
+class CursorOptInMixin:
+    """Переключает пагинацию в режим курсора, если в запросе есть ?cursor=.
+
+    Курсор не считает COUNT(*) и не использует OFFSET, а прежний контракт
+    (page/limit или limit/offset) остаётся режимом по умолчанию.
+    """
+
+    cursor_pagination_class = None
+    cursor_query_param = "cursor"
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(
+            view
+        ) + self.cursor_pagination_class().get_schema_operation_parameters(view)
+
+
+class MainPagePagination(CursorOptInMixin, CachedCountMixin, PageNumberPagination):
     page_size_query_param = "limit"
     page_size = MAIN_PAGE_RECORDS_LIMIT
+    cursor_pagination_class = RecipeCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            get_count=partial(self.get_cached_count, request=request, view=view),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class UserPagination(CursorOptInMixin, CachedCountMixin, LimitOffsetPagination):
+    cursor_pagination_class = UserCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        count = self.get_cached_count(queryset, self.request, self.view)
+        if count is None:
+            return super().get_count(queryset)
+        return count
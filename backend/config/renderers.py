@@ -0,0 +1,43 @@
+import json
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class PlainTextRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Ошибки DRF (словари) отдаются как JSON-текст
+        if data is None or isinstance(data, (str, bytes)):
+            return data
+        return json.dumps(data, ensure_ascii=False)
+
+
+class CSVRenderer(PlainTextRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson: компактный UTF-8 без пробелов-разделителей.
+
+    Типы, которые orjson не знает (Decimal, ленивые строки и т. п.),
+    преобразуются кодировщиком DRF.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        options = self.options
+        renderer_context = renderer_context or {}
+        # orjson поддерживает только отступ в 2 пробела
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=JSONEncoder().default, option=options)
@@ -0,0 +1,137 @@
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .checks import cache_is_shared
+from .constants import REPLICA_PIN_TIMEOUT, REPLICA_RETRY_TIMEOUT
+
+# Чтение из реплик включается только на время безопасного запроса к
+# представлению с replica_reads = True; всё остальное идёт в основную базу.
+# Список реплик — settings.DATABASE_REPLICAS. Закрепление за основной базой
+# хранится в кэше, поэтому без общего кэша реплики не используются.
+
+_read_alias = ContextVar("read_alias", default=None)
+_unhealthy_until = {}
+
+
+def replica_is_healthy(alias):
+    if _unhealthy_until.get(alias, 0) > time.monotonic():
+        return False
+
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unhealthy_until[alias] = time.monotonic() + REPLICA_RETRY_TIMEOUT
+        return False
+    return True
+
+
+def choose_replica():
+    """Случайная доступная реплика или основная база, если доступных нет."""
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if replica_is_healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def primary_reads():
+    """Чтение из основной базы внутри блока.
+
+    Данные, которые попадут в общий кэш, не берутся из реплики: отставшая
+    реплика сразу после смены версии закэшировала бы старое состояние.
+    """
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_key(request):
+    credentials = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return "db-pin:" + hashlib.md5(credentials.encode()).hexdigest()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтение в реплики и закрепляет автора записи за основной базой.
+
+    После успешного небезопасного запроса клиент на REPLICA_PIN_TIMEOUT секунд
+    читает только из основной базы, чтобы сразу видеть свои изменения.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            key = pin_key(request)
+            if key:
+                cache.set(key, True, REPLICA_PIN_TIMEOUT)
+        return response
+
+    async def __acall__(self, request):
+        token = _read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            key = pin_key(request)
+            if key:
+                await cache.aset(key, True, REPLICA_PIN_TIMEOUT)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and cache_is_shared()
+            and request.method in SAFE_METHODS
+            and getattr(getattr(view_func, "cls", None), "replica_reads", False)
+        ):
+            key = pin_key(request)
+            if key is None or not cache.get(key):
+                _read_alias.set(choose_replica())
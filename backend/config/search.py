@@ -0,0 +1,231 @@
+import re
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый поиск по рецептам и ингредиентам. Реализация выбирается по
+# типу базы: PostgreSQL — tsvector/pg_trgm, SQLite — FTS5, иначе — LIKE.
+# Индексы создаются миграциями через create_search_index/drop_search_index.
+
+RECIPE_TABLE = "recipes_recipe"
+INGREDIENT_TABLE = "ingredients_ingredient"
+
+
+def fold(value):
+    return value.replace("ё", "е").replace("Ё", "Е")
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def glob_prefix(value):
+    """Шаблон GLOB для поиска по началу без учёта регистра и ё.
+
+    LIKE в SQLite не знает регистра кириллицы, поэтому каждая буква
+    превращается в класс из её вариантов: «ме» → «[Мм][ЕЁеё]*».
+    """
+    pattern = []
+    for char in value.lower():
+        if char.isalpha():
+            variants = {char, char.upper()}
+            if char in "её":
+                variants |= {"е", "ё", "Е", "Ё"}
+            pattern.append("[{}]".format("".join(sorted(variants))))
+        elif char in "*?[":
+            pattern.append(f"[{char}]")
+        else:
+            pattern.append(char)
+    return "".join(pattern) + "*"
+
+
+class SearchBackend:
+    index_sql = {}
+    drop_index_sql = {}
+
+    def search_recipes(self, queryset, query):
+        return queryset.filter(Q(name__icontains=query) | Q(text__icontains=query))
+
+    def search_ingredients(self, queryset, query):
+        return queryset.filter(name__icontains=query)
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    # Выражение должно совпадать с индексом, иначе планировщик его не использует
+    recipe_vector = (
+        "to_tsvector('russian'::regconfig, translate("
+        "coalesce({0}name, '') || ' ' || coalesce({0}text, ''), 'ёЁ', 'еЕ'))"
+    )
+    ingredient_name = "translate(upper({0}name), 'Ё', 'Е')"
+    index_sql = {
+        "recipe": (
+            f"CREATE INDEX IF NOT EXISTS recipes_recipe_search_idx "
+            f"ON {RECIPE_TABLE} USING gin (({recipe_vector.format('')}))",
+        ),
+        "ingredient": (
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f"CREATE INDEX IF NOT EXISTS ingredients_ingredient_name_fold_trgm_idx "
+            f"ON {INGREDIENT_TABLE} "
+            f"USING gin (({ingredient_name.format('')}) gin_trgm_ops)",
+        ),
+    }
+    drop_index_sql = {
+        "recipe": ("DROP INDEX IF EXISTS recipes_recipe_search_idx",),
+        "ingredient": (
+            # Индекс по upper(name) без замены ё из первой версии миграции
+            "DROP INDEX IF EXISTS ingredients_ingredient_name_trgm_idx",
+            "DROP INDEX IF EXISTS ingredients_ingredient_name_fold_trgm_idx",
+        ),
+    }
+
+    def search_recipes(self, queryset, query):
+        vector = self.recipe_vector.format(f'"{RECIPE_TABLE}".')
+        return queryset.filter(
+            RawSQL(
+                f"{vector} @@ websearch_to_tsquery('russian'::regconfig, %s)",
+                (fold(query),),
+                output_field=BooleanField(),
+            )
+        )
+
+    def search_ingredients(self, queryset, query):
+        # Аналог icontains по тому же выражению, что и trigram-индекс;
+        # upper() для запроса тоже выполняет база, чтобы регистр совпадал
+        name = self.ingredient_name.format(f'"{INGREDIENT_TABLE}".')
+        return (
+            queryset.filter(
+                RawSQL(
+                    f"{name} LIKE translate(upper(%s), 'Ё', 'Е')",
+                    (f"%{escape_like(query)}%",),
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(similarity=TrigramSimilarity("name", fold(query)))
+            .order_by("-similarity", "name")
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    # Таблицы FTS5 хранят копию текста с ё → е и обновляются триггерами
+    recipe_fts = f"{RECIPE_TABLE}_fts"
+    ingredient_fts = f"{INGREDIENT_TABLE}_fts"
+    recipe_columns = (
+        "replace(replace({0}.name, 'ё', 'е'), 'Ё', 'Е'), "
+        "replace(replace({0}.text, 'ё', 'е'), 'Ё', 'Е')"
+    )
+    ingredient_columns = "replace(replace({0}.name, 'ё', 'е'), 'Ё', 'Е')"
+    index_sql = {
+        "recipe": (
+            f"CREATE VIRTUAL TABLE {recipe_fts} USING fts5("
+            f"name, text, tokenize='unicode61 remove_diacritics 2')",
+            f"INSERT INTO {recipe_fts}(rowid, name, text) "
+            f"SELECT id, {recipe_columns.format(RECIPE_TABLE)} FROM {RECIPE_TABLE}",
+            f"CREATE TRIGGER {recipe_fts}_ai AFTER INSERT ON {RECIPE_TABLE} BEGIN "
+            f"INSERT INTO {recipe_fts}(rowid, name, text) "
+            f"VALUES (new.id, {recipe_columns.format('new')}); END",
+            f"CREATE TRIGGER {recipe_fts}_ad AFTER DELETE ON {RECIPE_TABLE} BEGIN "
+            f"DELETE FROM {recipe_fts} WHERE rowid = old.id; END",
+            f"CREATE TRIGGER {recipe_fts}_au AFTER UPDATE ON {RECIPE_TABLE} BEGIN "
+            f"DELETE FROM {recipe_fts} WHERE rowid = old.id; "
+            f"INSERT INTO {recipe_fts}(rowid, name, text) "
+            f"VALUES (new.id, {recipe_columns.format('new')}); END",
+        ),
+        "ingredient": (
+            f"CREATE VIRTUAL TABLE {ingredient_fts} USING fts5("
+            f"name, tokenize='trigram')",
+            f"INSERT INTO {ingredient_fts}(rowid, name) "
+            f"SELECT id, {ingredient_columns.format(INGREDIENT_TABLE)} "
+            f"FROM {INGREDIENT_TABLE}",
+            f"CREATE TRIGGER {ingredient_fts}_ai AFTER INSERT ON {INGREDIENT_TABLE} "
+            f"BEGIN INSERT INTO {ingredient_fts}(rowid, name) "
+            f"VALUES (new.id, {ingredient_columns.format('new')}); END",
+            f"CREATE TRIGGER {ingredient_fts}_ad AFTER DELETE ON {INGREDIENT_TABLE} "
+            f"BEGIN DELETE FROM {ingredient_fts} WHERE rowid = old.id; END",
+            f"CREATE TRIGGER {ingredient_fts}_au AFTER UPDATE ON {INGREDIENT_TABLE} "
+            f"BEGIN DELETE FROM {ingredient_fts} WHERE rowid = old.id; "
+            f"INSERT INTO {ingredient_fts}(rowid, name) "
+            f"VALUES (new.id, {ingredient_columns.format('new')}); END",
+        ),
+    }
+    drop_index_sql = {
+        "recipe": (
+            f"DROP TRIGGER IF EXISTS {recipe_fts}_ai",
+            f"DROP TRIGGER IF EXISTS {recipe_fts}_ad",
+            f"DROP TRIGGER IF EXISTS {recipe_fts}_au",
+            f"DROP TABLE IF EXISTS {recipe_fts}",
+        ),
+        "ingredient": (
+            f"DROP TRIGGER IF EXISTS {ingredient_fts}_ai",
+            f"DROP TRIGGER IF EXISTS {ingredient_fts}_ad",
+            f"DROP TRIGGER IF EXISTS {ingredient_fts}_au",
+            f"DROP TABLE IF EXISTS {ingredient_fts}",
+        ),
+    }
+
+    @staticmethod
+    def match_query(query):
+        # Каждое слово ищется по префиксу — грубая замена стемминга
+        words = re.findall(r"\w+", fold(query))
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search_recipes(self, queryset, query):
+        match = self.match_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(
+            RawSQL(
+                f'"{RECIPE_TABLE}"."id" IN (SELECT rowid FROM {self.recipe_fts} '
+                f"WHERE {self.recipe_fts} MATCH %s)",
+                (match,),
+                output_field=BooleanField(),
+            )
+        )
+
+    def search_ingredients(self, queryset, query):
+        query = fold(query).strip()
+        # Trigram-токенизатор не находит строки короче трёх символов
+        if len(query) < 3:
+            return queryset.filter(
+                RawSQL(
+                    f'"{INGREDIENT_TABLE}"."name" GLOB %s',
+                    (glob_prefix(query),),
+                    output_field=BooleanField(),
+                )
+            )
+        return queryset.filter(
+            RawSQL(
+                f'"{INGREDIENT_TABLE}"."id" IN (SELECT rowid FROM '
+                f"{self.ingredient_fts} WHERE {self.ingredient_fts} MATCH %s)",
+                ('"{}"'.format(query.replace('"', '""')),),
+                output_field=BooleanField(),
+            )
+        )
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgreSQLSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using=connection):
+    return SEARCH_BACKENDS.get(using.vendor, SearchBackend)()
+
+
+def run_search_sql(model, attribute):
+    def operation(apps, schema_editor):
+        backend = get_search_backend(schema_editor.connection)
+        for statement in getattr(backend, attribute).get(model, ()):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+def create_search_index(model):
+    return run_search_sql(model, "index_sql")
+
+
+def drop_search_index(model):
+    return run_search_sql(model, "drop_index_sql")
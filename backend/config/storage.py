@@ -0,0 +1,116 @@
+import hashlib
+import os
+import posixpath
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+from .compression import ENCODINGS, compress
+from .constants import MEDIA_GC_MIN_AGE
+
+# Поля, ссылающиеся на файлы в хранилище. Файлы без ссылок удаляет только
+# gc_media и только старше MEDIA_GC_MIN_AGE: одинаковое содержимое делится
+# между записями, и запись, которая ещё не закоммичена, может ссылаться на
+# файл, уже потерявший остальные ссылки
+MEDIA_REFERENCES = (("recipes.Recipe", "image"), ("users.User", "avatar"))
+
+CONTENT_DIR = "images"
+RENDITIONS_DIR = "renditions"
+
+# Статика, которую имеет смысл сжимать; картинки и шрифты woff уже сжаты
+COMPRESSIBLE_STATIC = (".css", ".js", ".map", ".svg", ".json", ".txt", ".html")
+STATIC_COMPRESSION_MIN_SIZE = 256
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Называет загружаемые файлы по SHA-256 содержимого.
+
+    Одинаковые изображения хранятся один раз, а имя файла не меняется, пока
+    не меняется содержимое, поэтому URL можно кэшировать навсегда.
+    Рендиции в RENDITIONS_DIR сохраняются под переданным именем.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name.startswith(f"{RENDITIONS_DIR}/"):
+            return super().save(name, content, max_length)
+
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Повторная загрузка освежает mtime: пока новая запись не
+            # закоммичена, файл защищён от gc_media возрастом
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                # Удалён между exists() и utime() — сохраняется заново
+                pass
+        return super().save(name, content, max_length)
+
+    @staticmethod
+    def content_name(name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        digest = digest.hexdigest()
+        ext = posixpath.splitext(name)[1].lower()
+        return f"{CONTENT_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями .gz и .br.
+
+    nginx отдаёт сжатые копии сам (gzip_static), поэтому сжатие происходит
+    один раз при collectstatic, а не на каждый запрос.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_STATIC):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < STATIC_COMPRESSION_MIN_SIZE:
+            return
+
+        for encoding, (extension, _) in ENCODINGS.items():
+            compressed = compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self.save(name + extension, ContentFile(compressed))
+
+
+def referenced_media():
+    names = set()
+    for model, field in MEDIA_REFERENCES:
+        names.update(
+            apps.get_model(model)
+            .objects.exclude(**{field: ""})
+            .values_list(field, flat=True)
+        )
+    return names
+
+
+def recently_saved(name, min_age=None, storage=default_storage):
+    """Файл сохранён или загружен повторно не раньше min_age секунд назад.
+
+    Такой файл может принадлежать записи из незакоммиченной транзакции.
+    """
+    if min_age is None:
+        min_age = MEDIA_GC_MIN_AGE
+    threshold = timezone.now() - timedelta(seconds=min_age)
+    return storage.get_modified_time(name) > threshold
@@ -0,0 +1,23 @@
+import base64
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from PIL import Image
+
+# Общие помощники тестов приложений
+
+
+def create_user(username):
+    return get_user_model().objects.create_user(
+        email=f"{username}@example.com",
+        username=username,
+        first_name=username,
+        last_name=username,
+        password="password",
+    )
+
+
+def image_data_url(size, exif=None):
+    output = BytesIO()
+    Image.new("RGB", size, "orange").save(output, "JPEG", exif=exif or b"")
+    return "data:image/jpeg;base64," + base64.b64encode(output.getvalue()).decode()
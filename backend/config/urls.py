@@ -22,12 +22,17 @@ from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularSwaggerView, SpectacularAPIView
 
 from apps.recipes.views import ShortRecipeRedirectView
+from config.cache import async_cached_view
+
+short_link_view = ShortRecipeRedirectView.as_view()
+if settings.ASYNC_VIEWS:
+    short_link_view = async_cached_view(short_link_view)
 
 urlpatterns = [
     path("api/users/", include("apps.users.urls")),
     path("api/ingredients/", include("apps.ingredients.urls")),
     path("api/recipes/", include("apps.recipes.urls")),
-    path("s/<int:pk>/", ShortRecipeRedirectView.as_view()),
+    path("s/<int:pk>/", short_link_view),
     path("api/auth/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
     path("admin/", admin.site.urls),
@@ -39,5 +44,7 @@ urlpatterns = [
     ),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# В продакшене медиа и статику отдаёт nginx, не занимая воркеры
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,86 @@
+"""Конфигурация gunicorn, читается автоматически из рабочего каталога.
+
+Все значения можно переопределить переменными окружения GUNICORN_*,
+режим сервера — SERVER_MODE=wsgi|asgi.
+"""
+
+import os
+import time
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def available_cpus():
+    # sched_getaffinity учитывает ограничения cpuset контейнера
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+cpus = available_cpus()
+asgi = os.environ.get("SERVER_MODE", "wsgi") == "asgi"
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "config.asgi:application" if asgi else "config.wsgi:application"
+
+# gthread: потоки ждут базу и диск, не блокируя весь процесс
+worker_class = "uvicorn_worker.UvicornWorker" if asgi else "gthread"
+workers = env_int("GUNICORN_WORKERS", cpus * 2 + 1)
+# Под ASGI uvicorn потоки не использует, то же значение задаёт размер пула
+# синхронных view (settings.SYNC_VIEW_THREADS)
+threads = env_int("GUNICORN_THREADS", 4)
+
+# Приложение загружается до fork и делит память между воркерами. Данные
+# в памяти процесса (LocMemCache, индекс ингредиентов) после fork у каждого
+# воркера свои, поэтому общий кэш должен быть внешним (CACHE_URL, redis)
+preload_app = True
+
+# Перезапуск воркеров со случайным разбросом, чтобы не рестартовать все сразу
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+accesslog = "-"
+errorlog = "-"
+slow_request_threshold = env_int("GUNICORN_SLOW_REQUEST_MS", 500) / 1000
+
+
+def when_ready(server):
+    # С локальным кэшем воркеры не видят инвалидацию друг друга
+    from config.checks import check_shared_cache
+
+    if workers > 1:
+        for warning in check_shared_cache(None):
+            server.log.warning("%s %s", warning.msg, warning.hint)
+
+
+def post_fork(server, worker):
+    # Соединения, открытые при загрузке приложения, не должны делиться между
+    # процессами
+    from django.db import connections
+
+    connections.close_all()
+
+
+# Хуки вызываются только синхронными воркерами (gthread), не uvicorn
+def pre_request(worker, req):
+    req.started_at = time.monotonic()
+
+
+def post_request(worker, req, environ, resp):
+    duration = time.monotonic() - req.started_at
+    log = worker.log.warning if duration >= slow_request_threshold else worker.log.debug
+    log(
+        "%s %s -> %s за %.1f мс (pid %s)",
+        req.method,
+        req.path,
+        resp.status,
+        duration * 1000,
+        worker.pid,
+    )